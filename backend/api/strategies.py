@@ -299,8 +299,9 @@ async def get_account_info():
 async def sync_positions(strategy_id: int, db: Session = Depends(get_db)):
     """Sync positions from Alpaca to database"""
     try:
-        trading_service.update_positions(strategy_id, db)
-        trading_service.update_filled_orders(strategy_id, db)
+        # Explicit user request: never skip because of the polling backoff
+        trading_service.update_positions(strategy_id, db, force=True)
+        await trading_service.update_filled_orders_async(strategy_id, db, force=True)
         performance_service.update_daily_performance(strategy_id, db)
         
         return {"message": "Positions synced successfully"}
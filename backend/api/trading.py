@@ -12,6 +12,14 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/trading", tags=["trading"])
 trading_service = TradingService()
 
+# Last-resort prices for /quote/{symbol} when both market data and quotes fail
+QUOTE_FALLBACK_PRICES = {
+    'AAPL': 185.0, 'MSFT': 415.0, 'GOOGL': 140.0, 'AMZN': 185.0, 
+    'TSLA': 260.0, 'NVDA': 450.0, 'META': 280.0, 'F': 11.00,
+    'SPY': 460.0, 'QQQ': 380.0, 'NFLX': 380.0, 'PYPL': 85.0,
+    'AMD': 145.0, 'ARKK': 52.0, 'GLD': 195.0, 'SLV': 29.0
+}
+
 class OrderRequest(BaseModel):
     strategy_id: int
     symbol: str
@@ -128,11 +136,20 @@ async def get_strategy_trades(strategy_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/market-data")
+async def get_market_data_multi(symbols: str, timeframe: str = "1Day", limit: int = 100):
+    """Get historical market data for multiple symbols (comma-separated)"""
+    try:
+        symbol_list = [s.strip() for s in symbols.split(',')]
+        return trading_service.get_market_data_multi(symbol_list, timeframe, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/market-data/{symbol}")
-async def get_market_data(symbol: str, timeframe: str = "1Day", limit: int = 100):
-    """Get historical market data for a symbol"""
+async def get_market_data(symbol: str, timeframe: str = "1Day", limit: int = 100, format: str = "rows"):
+    """Get historical market data for a symbol (format: "rows" or "columnar")"""
     try:
-        return trading_service.get_market_data(symbol, timeframe, limit)
+        return trading_service.get_market_data(symbol, timeframe, limit, columnar=format == "columnar")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -141,7 +158,7 @@ async def get_latest_quotes(symbols: str):
     """Get latest quotes for multiple symbols (comma-separated)"""
     try:
         symbol_list = [s.strip() for s in symbols.split(',')]
-        return trading_service.get_latest_quotes(symbol_list)
+        return await trading_service.get_latest_quotes_async(symbol_list)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -251,13 +268,7 @@ async def get_single_quote(symbol: str):
         
         # Final fallback to hardcoded prices if all else fails
         if current_price <= 0:
-            fallback_prices = {
-                'AAPL': 185.0, 'MSFT': 415.0, 'GOOGL': 140.0, 'AMZN': 185.0, 
-                'TSLA': 260.0, 'NVDA': 450.0, 'META': 280.0, 'F': 11.00,
-                'SPY': 460.0, 'QQQ': 380.0, 'NFLX': 380.0, 'PYPL': 85.0,
-                'AMD': 145.0, 'ARKK': 52.0, 'GLD': 195.0, 'SLV': 29.0
-            }
-            current_price = fallback_prices.get(symbol, 100.0)
+            current_price = QUOTE_FALLBACK_PRICES.get(symbol, 100.0)
             prev_close = current_price * 0.99  # Simulate small daily gain
             today_open = prev_close * 1.002
             today_high = current_price * 1.005
@@ -15,10 +15,20 @@ postgres_available = os.getenv("POSTGRES_AVAILABLE", "false").lower() == "true"
 if "postgresql" in DATABASE_URL and not postgres_available:
     DATABASE_URL = "sqlite:///./divetrader.db"
 
+# Connection pool sizing for server databases (SQLite keeps SQLAlchemy's defaults)
+pool_settings = {} if "sqlite" in DATABASE_URL else {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": True
+}
+
 engine = create_engine(
     DATABASE_URL,
     # SQLite specific settings
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    **pool_settings
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -36,4 +46,7 @@ def get_db():
 # Create tables
 def create_tables():
     from .models import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from .migrate_add_indexes import add_indexes
+    Base.metadata.create_all(bind=engine)
+    # create_all leaves existing tables alone; backfill indexes added to the models since
+    add_indexes(engine)
\ No newline at end of file
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Migration script to add composite indexes used by TradingService
+- uq_positions_strategy_symbol: unique (strategy_id, symbol), required by the upsert in update_positions
+- ix_trades_strategy_status: (strategy_id, status), used by the pending-trade poll in update_filled_orders
+
+create_all() never adds indexes to tables that already exist, so create_tables() and
+init_database() call add_indexes() on every startup; each step is a no-op once applied
+and works on any dialect. To apply them by hand against the configured DATABASE_URL:
+
+    python database/migrate_add_indexes.py [--sqlmodel]
+"""
+
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+POSITION_UNIQUE_INDEX = "uq_positions_strategy_symbol"
+TRADE_STATUS_INDEX = "ix_trades_strategy_status"
+
+# Surviving row per (strategy_id, symbol) when collapsing duplicate positions
+KEEP_POSITION_IDS = "SELECT MAX(id) FROM positions GROUP BY strategy_id, symbol"
+
+def _has_unique_index(inspector, table: str, name: str, columns: tuple) -> bool:
+    """True if `table` has `name`, or any unique index/constraint on exactly `columns`"""
+    entries = [i for i in inspector.get_indexes(table) if i.get("unique")]
+    entries += inspector.get_unique_constraints(table)
+    return any(e.get("name") == name or set(e["column_names"]) == set(columns) for e in entries)
+
+def ensure_position_unique_index(engine: Engine):
+    """Add uq_positions_strategy_symbol to an existing positions table (idempotent)"""
+    try:
+        inspector = inspect(engine)
+        if not inspector.has_table("positions"):
+            return
+        if _has_unique_index(inspector, "positions", POSITION_UNIQUE_INDEX, ("strategy_id", "symbol")):
+            return
+        
+        with engine.begin() as conn:
+            # Point trades at the surviving row of their (strategy, symbol) before dropping duplicates
+            if inspector.has_table("trades"):
+                conn.execute(text(f"""
+                    UPDATE trades SET position_id = (
+                        SELECT MAX(kept.id) FROM positions kept
+                        JOIN positions dup ON kept.strategy_id = dup.strategy_id AND kept.symbol = dup.symbol
+                        WHERE dup.id = trades.position_id
+                    )
+                    WHERE position_id IS NOT NULL AND position_id NOT IN ({KEEP_POSITION_IDS})
+                """))
+            removed = conn.execute(text(f"DELETE FROM positions WHERE id NOT IN ({KEEP_POSITION_IDS})")).rowcount
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX {POSITION_UNIQUE_INDEX} ON positions (strategy_id, symbol)"
+            ))
+        logger.info(f"Added {POSITION_UNIQUE_INDEX} index (removed {removed} duplicate positions)")
+    except Exception as e:
+        # update_positions falls back to a portable merge while the index is missing
+        logger.error(f"Error adding {POSITION_UNIQUE_INDEX} index: {e}")
+
+def ensure_trade_status_index(engine: Engine):
+    """Add ix_trades_strategy_status to an existing trades table (idempotent)"""
+    try:
+        inspector = inspect(engine)
+        if not inspector.has_table("trades"):
+            return
+        if any(i["name"] == TRADE_STATUS_INDEX or i["column_names"] == ["strategy_id", "status"]
+               for i in inspector.get_indexes("trades")):
+            return
+        
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE INDEX {TRADE_STATUS_INDEX} ON trades (strategy_id, status)"))
+        logger.info(f"Added {TRADE_STATUS_INDEX} index")
+    except Exception as e:
+        logger.error(f"Error adding {TRADE_STATUS_INDEX} index: {e}")
+
+def add_indexes(engine: Engine):
+    """Apply every index backfill in this module to `engine`"""
+    ensure_position_unique_index(engine)
+    ensure_trade_status_index(engine)
+
+if __name__ == "__main__":
+    import os
+    import sys
+    
+    # Add the backend directory to Python path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    logging.basicConfig(level=logging.INFO)
+    
+    # Same DATABASE_URL resolution as the app; pass --sqlmodel for the SQLModel database
+    if "--sqlmodel" in sys.argv:
+        from database.sqlmodel_database import engine
+    else:
+        from database.database import engine
+    add_indexes(engine)
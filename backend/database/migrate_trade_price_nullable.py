@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Migration script to make trades.price nullable in the SQLModel database
+
+TradingService.place_order(validate_risk=False) records the trade before its fill
+price is known (update_filled_orders fills it in later), so trades.price must accept
+NULL. create_all() never alters existing columns, so create_tables() calls
+ensure_trade_price_nullable() on every startup; it is a no-op once applied.
+To apply it by hand against the configured DATABASE_URL:
+
+    python database/migrate_trade_price_nullable.py
+"""
+
+import logging
+import re
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# "price FLOAT NOT NULL" (optionally quoted) in the CREATE TABLE statement SQLite stores
+PRICE_NOT_NULL = re.compile(r'(["`]?\bprice\b["`]?\s+\w+(?:\s*\([^)]*\))?)\s+NOT NULL', re.IGNORECASE)
+
+def _rebuild_sqlite_trades(conn):
+    """SQLite can't drop NOT NULL in place: recreate trades with the relaxed column"""
+    create_sql = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'trades'"
+    )).scalar()
+    # Indexes backing UNIQUE constraints have no SQL and are recreated with the table
+    index_sql = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'trades' AND sql IS NOT NULL"
+    )).scalars().all()
+
+    conn.execute(text("ALTER TABLE trades RENAME TO trades_old"))
+    conn.execute(text(PRICE_NOT_NULL.sub(r"\1", create_sql, count=1)))
+    conn.execute(text("INSERT INTO trades SELECT * FROM trades_old"))
+    conn.execute(text("DROP TABLE trades_old"))
+    for statement in index_sql:
+        conn.execute(text(statement))
+
+def ensure_trade_price_nullable(engine: Engine):
+    """Drop the NOT NULL constraint on trades.price if present (idempotent)"""
+    try:
+        inspector = inspect(engine)
+        if not inspector.has_table("trades"):
+            return
+        price = next((c for c in inspector.get_columns("trades") if c["name"] == "price"), None)
+        if price is None or price["nullable"]:
+            return
+
+        with engine.begin() as conn:
+            if engine.dialect.name == "sqlite":
+                _rebuild_sqlite_trades(conn)
+            else:
+                conn.execute(text("ALTER TABLE trades ALTER COLUMN price DROP NOT NULL"))
+        logger.info("Made trades.price nullable")
+    except Exception as e:
+        logger.error(f"Error making trades.price nullable: {e}")
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    # Add the backend directory to Python path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    logging.basicConfig(level=logging.INFO)
+
+    from database.sqlmodel_database import engine
+    ensure_trade_price_nullable(engine)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum, UniqueConstraint, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -39,6 +39,10 @@ class Strategy(Base):
 
 class Position(Base):
     __tablename__ = "positions"
+    __table_args__ = (
+        # One row per (strategy, symbol) - required for upserts in update_positions
+        UniqueConstraint("strategy_id", "symbol", name="uq_positions_strategy_symbol"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     strategy_id = Column(Integer, ForeignKey("strategies.id"))
@@ -49,8 +53,11 @@ class Position(Base):
     market_value = Column(Float)
     unrealized_pnl = Column(Float)
     side = Column(String(10))  # long/short
-    opened_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Updates are stamped by the database (NOW()) instead of shipping a Python
+    # timestamp per row. Inserts keep the Python default: tables created before
+    # server_default was added have no column default, and SQLite can't add one in place
+    opened_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     strategy = relationship("Strategy", back_populates="positions")
@@ -58,6 +65,10 @@ class Position(Base):
 
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        # Pending-trade poll in update_filled_orders filters on both columns
+        Index("ix_trades_strategy_status", "strategy_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     strategy_id = Column(Integer, ForeignKey("strategies.id"))
@@ -71,7 +82,7 @@ class Trade(Base):
     realized_pnl = Column(Float, default=0.0)
     status = Column(Enum(OrderStatus))
     executed_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     
     # Relationships
     strategy = relationship("Strategy", back_populates="trades")
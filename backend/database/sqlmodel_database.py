@@ -4,6 +4,8 @@ Replaces the old SQLAlchemy setup with SQLModel for better type safety
 """
 
 from sqlmodel import create_engine, SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
 from typing import Generator
 import os
 from dotenv import load_dotenv
@@ -19,12 +21,34 @@ postgres_available = os.getenv("POSTGRES_AVAILABLE", "false").lower() == "true"
 if "postgresql" in DATABASE_URL and not postgres_available:
     DATABASE_URL = "sqlite:///./divetrader_sqlmodel.db"
 
+# Connection pool sizing for server databases (SQLite keeps SQLAlchemy's defaults)
+pool_settings = {} if "sqlite" in DATABASE_URL else {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": True
+}
+
 # Create engine with SQLModel
 engine = create_engine(
     DATABASE_URL,
     # SQLite specific settings
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False  # Set to True for SQL query logging
+    echo=False,  # Set to True for SQL query logging
+    **pool_settings
+)
+
+# Async engine on the same database for code running on an event loop
+# (asyncpg for PostgreSQL, aiosqlite for SQLite)
+ASYNC_DATABASE_URL = DATABASE_URL.replace(
+    "postgresql://", "postgresql+asyncpg://", 1
+).replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    **pool_settings
 )
 
 def create_tables():
@@ -37,6 +61,12 @@ def create_tables():
     )
     
     SQLModel.metadata.create_all(engine)
+    
+    # create_all leaves existing tables alone; backfill schema changes made to the models since
+    from database.migrate_trade_price_nullable import ensure_trade_price_nullable
+    from database.migrate_add_indexes import add_indexes
+    ensure_trade_price_nullable(engine)
+    add_indexes(engine)
 
 def get_session() -> Generator[Session, None, None]:
     """Dependency for getting database sessions"""
@@ -48,6 +78,10 @@ def SessionLocal():
     """Legacy compatibility for old SQLAlchemy session pattern"""
     return Session(engine)
 
+def AsyncSessionLocal() -> AsyncSession:
+    """Async counterpart of SessionLocal, for use with `async with`"""
+    return AsyncSession(async_engine, expire_on_commit=False)
+
 # Dependency for FastAPI
 def get_db() -> Generator[Session, None, None]:
     """FastAPI dependency for database sessions"""
@@ -4,6 +4,7 @@ Replaces the old SQLAlchemy models with type-safe SQLModel equivalents
 """
 
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, UniqueConstraint
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -60,6 +61,10 @@ class Strategy(SQLModel, table=True):
 class Position(SQLModel, table=True):
     """Open positions for strategies"""
     __tablename__ = "positions"
+    __table_args__ = (
+        # One row per (strategy, symbol) - required for upserts in TradingService.update_positions
+        UniqueConstraint("strategy_id", "symbol", name="uq_positions_strategy_symbol"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     strategy_id: int = Field(foreign_key="strategies.id")
@@ -80,6 +85,10 @@ class Position(SQLModel, table=True):
 class Trade(SQLModel, table=True):
     """Executed trades"""
     __tablename__ = "trades"
+    __table_args__ = (
+        # Pending-trade poll in TradingService.update_filled_orders filters on both columns
+        Index("ix_trades_strategy_status", "strategy_id", "status"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     strategy_id: int = Field(foreign_key="strategies.id")
@@ -88,7 +97,7 @@ class Trade(SQLModel, table=True):
     symbol: str = Field(max_length=10, index=True)
     side: str = Field(max_length=10)  # buy/sell
     quantity: float = Field(gt=0)
-    price: float = Field(gt=0)
+    price: Optional[float] = Field(default=None, gt=0)  # Unset until the fill when placed without a quote
     commission: float = Field(default=0.0, ge=0)
     realized_pnl: float = Field(default=0.0)
     status: OrderStatusEnum
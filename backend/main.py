@@ -1,8 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from database.database import create_tables
 from api.strategies import router as strategies_router
-from api.trading import router as trading_router
+from api.trading import router as trading_router, trading_service as trading_api_service
 from api.risk_management import router as risk_router
 from api.strategy_events import router as events_router
 from api.strategy_settings import router as settings_router
@@ -28,7 +29,8 @@ logging.basicConfig(
 # Create database tables
 create_tables()
 
-app = FastAPI(title="DiveTrader API", version="1.0.0")
+# orjson for every endpoint; uvicorn[standard] already runs on uvloop + httptools (loop="auto")
+app = FastAPI(title="DiveTrader API", version="1.0.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -67,6 +69,9 @@ async def startup_event():
     # Strategy runner manages its own threads, no need to start anything here
     # It will start strategies when requested via API calls
     logger.info("Strategy runner ready")
+    
+    # Keep quoted prices warm for the trading API
+    trading_api_service.start_price_refresh()
 
 @app.on_event("shutdown") 
 async def shutdown_event():
@@ -79,6 +84,7 @@ async def shutdown_event():
     for strategy_id in list(strategy_runner.running_strategies.keys()):
         strategy_runner.stop_strategy(strategy_id)
     
+    trading_api_service.stop_price_refresh()
     logger.info("Strategy runner shutdown complete")
 
 if __name__ == "__main__":
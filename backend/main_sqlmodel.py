@@ -5,9 +5,10 @@ Type-safe database models and auto-generated schemas
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from database.sqlmodel_database import init_database
 from api.strategies import router as legacy_strategies_router
-from api.trading import router as trading_router
+from api.trading import router as trading_router, trading_service as trading_api_service
 from api.risk_management import router as risk_router
 from api.strategy_events import router as events_router
 from api.strategy_settings import router as legacy_settings_router
@@ -34,10 +35,12 @@ logging.basicConfig(
 # Initialize SQLModel database
 init_database()
 
+# orjson for every endpoint; uvicorn[standard] already runs on uvloop + httptools (loop="auto")
 app = FastAPI(
     title="DiveTrader API v2 (SQLModel)", 
     version="2.0.0",
-    description="Type-safe trading platform API with auto-generated schemas"
+    description="Type-safe trading platform API with auto-generated schemas",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -116,6 +119,9 @@ async def startup_event():
     
     # The typed strategy runner manages its own threads
     # Strategies will be started when requested via API calls
+    
+    # Keep quoted prices warm for the trading API
+    trading_api_service.start_price_refresh()
 
 @app.on_event("shutdown") 
 async def shutdown_event():
@@ -126,6 +132,7 @@ async def shutdown_event():
     # Stop all running strategies
     typed_strategy_runner.shutdown()
     
+    trading_api_service.stop_price_refresh()
     logger.info("✅ Typed strategy runner shutdown complete")
 
 if __name__ == "__main__":
@@ -3,7 +3,8 @@ import json
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
-import pandas as pd
+import numpy as np
+from services.technical_indicators import AI_INDICATOR_FIELDS, ai_indicators
 
 logger = logging.getLogger(__name__)
 
@@ -418,36 +419,34 @@ class AIAnalysisService:
         if not price_data or len(price_data) < 5:
             return {}
         
-        df = pd.DataFrame(price_data)
-        df['close'] = pd.to_numeric(df['close'])
-        df['volume'] = pd.to_numeric(df['volume'])
+        try:
+            n = len(price_data)
+            close = np.fromiter((float(bar['close']) for bar in price_data), dtype=np.float64, count=n)
+            volume = np.fromiter((float(bar['volume']) for bar in price_data), dtype=np.float64, count=n)
+        except Exception as e:
+            logger.error(f"Error calculating technical indicators: {e}")
+            return {}
+        
+        return self.calculate_technical_indicators_arr(close, volume)
+
+    def calculate_technical_indicators_arr(self, close: np.ndarray, volume: np.ndarray) -> Dict:
+        """Calculate technical indicators for AI analysis from float64 close/volume arrays"""
+        n = close.size
+        if n < 5:
+            return {}
         
         indicators = {}
         
         try:
-            # Moving averages
-            indicators['short_ma'] = df['close'].rolling(window=3).mean().iloc[-1]
-            indicators['long_ma'] = df['close'].rolling(window=5).mean().iloc[-1]
-            
-            # RSI calculation (simplified)
-            if len(df) >= 14:
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                indicators['rsi'] = 100 - (100 / (1 + rs)).iloc[-1]
-            
-            # Bollinger Bands
-            if len(df) >= 20:
-                ma20 = df['close'].rolling(window=20).mean()
-                std20 = df['close'].rolling(window=20).std()
-                indicators['bb_upper'] = (ma20 + (std20 * 2)).iloc[-1]
-                indicators['bb_lower'] = (ma20 - (std20 * 2)).iloc[-1]
-                indicators['bb_middle'] = ma20.iloc[-1]
-            
-            # Volume indicators
-            indicators['avg_volume'] = df['volume'].rolling(window=10).mean().iloc[-1]
-            indicators['volume_ratio'] = df['volume'].iloc[-1] / indicators['avg_volume']
+            values = ai_indicators(close, volume)
+            for name, value in zip(AI_INDICATOR_FIELDS, values):
+                indicators[name] = value
+            
+            # RSI and Bollinger Bands are only reported once there are enough bars
+            if n < 14:
+                del indicators['rsi']
+            if n < 20:
+                del indicators['bb_upper'], indicators['bb_lower'], indicators['bb_middle']
             
         except Exception as e:
             logger.error(f"Error calculating technical indicators: {e}")
@@ -0,0 +1,181 @@
+import os
+import time
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from alpaca.data.requests import CryptoBarsRequest
+from alpaca.data.timeframe import TimeFrame
+from alpaca.data.historical import CryptoHistoricalDataClient
+from services.trading_service import get_crypto_data_client
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between bar requests to Alpaca (rate-limit headroom)
+BARS_REQUEST_SLEEP_TIME = float(os.getenv("BARS_REQUEST_SLEEP_TIME", "0"))
+
+# Seconds after a minute boundary at which prefetch() refreshes a symbol's bars
+BARS_PREFETCH_OFFSET = 1.0
+
+# Ways a BarSet may expose the bars for a symbol, tried in order until one works
+BARSET_ACCESSORS = (
+    lambda bars, symbol: bars.data[symbol],
+    lambda bars, symbol: bars[symbol],
+    lambda bars, symbol: getattr(bars, symbol.replace('/', '')),
+)
+
+class BarsCache:
+    """Process-wide cache of recent 1-minute crypto bars.
+
+    Entries are valid for the wall-clock minute they were fetched in, so every
+    strategy ticking within the same minute shares one response. Symbols that
+    miss while another thread is fetching are queued and fetched together in
+    the next single multi-symbol request.
+    """
+
+    def __init__(self, lookback: timedelta = timedelta(hours=2),
+                 sleep_time: float = BARS_REQUEST_SLEEP_TIME):
+        self.lookback = lookback
+        self.sleep_time = sleep_time
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, List[Any]]] = {}
+        self._pending: set = set()
+        self._last_request = 0.0
+        self._accessor = None
+        self._prefetch_timers: Dict[str, threading.Timer] = {}
+
+    @property
+    def client(self) -> Optional[CryptoHistoricalDataClient]:
+        try:
+            return get_crypto_data_client()
+        except Exception as e:
+            logger.error(f"Error initializing crypto data client: {e}")
+            return None
+
+    @staticmethod
+    def _bucket() -> int:
+        return int(time.time() // 60)
+
+    def _cached(self, symbol: str) -> Optional[List[Any]]:
+        entry = self._entries.get(symbol)
+        if entry and entry[0] == self._bucket():
+            return entry[1]
+        return None
+
+    def get_or_fetch(self, symbol: str, batch: bool = True) -> Optional[List[Any]]:
+        """Recent bars for `symbol`, oldest first; None if Alpaca returned none.
+
+        Pass batch=False for symbols that may be invalid (e.g. format probes) so they
+        are requested on their own and can't fail other callers' batched request.
+        """
+        with self._lock:
+            cached = self._cached(symbol)
+            if cached is not None:
+                return cached
+            if batch:
+                self._pending.add(symbol)
+
+        # One request in flight at a time; whoever gets the lock fetches every queued symbol
+        with self._fetch_lock:
+            with self._lock:
+                cached = self._cached(symbol)
+                if cached is not None:
+                    return cached
+                if batch:
+                    symbols = sorted(self._pending | {symbol})
+                    self._pending.clear()
+                else:
+                    symbols = [symbol]
+
+            fetched = self._fetch(symbols)
+            with self._lock:
+                bucket = self._bucket()
+                for fetched_symbol, data in fetched.items():
+                    self._entries[fetched_symbol] = (bucket, data)
+            return fetched.get(symbol)
+
+    def prefetch(self, symbol: str) -> None:
+        """Refresh `symbol` in the background just after the next minute starts,
+        so the next tick finds its bars already cached"""
+        with self._lock:
+            timer = self._prefetch_timers.get(symbol)
+            if timer is not None and timer.is_alive():
+                return
+            delay = (self._bucket() + 1) * 60 + BARS_PREFETCH_OFFSET - time.time()
+            timer = threading.Timer(delay, self._run_prefetch, args=(symbol,))
+            timer.daemon = True
+            self._prefetch_timers[symbol] = timer
+        timer.start()
+
+    def _run_prefetch(self, symbol: str) -> None:
+        try:
+            self.get_or_fetch(symbol)
+        except Exception as e:
+            logger.warning(f"Failed to prefetch crypto bars for {symbol}: {e}")
+
+    def _fetch(self, symbols: List[str]) -> Dict[str, List[Any]]:
+        """Request bars for `symbols` and return the non-empty results.
+
+        Alpaca rejects a whole multi-symbol request if any symbol is invalid, so a
+        failed batch is retried one symbol at a time.
+        """
+        if not self.client:
+            return {}
+
+        if self.sleep_time:
+            wait = self._last_request + self.sleep_time - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+        try:
+            end_time = datetime.now()
+            request = CryptoBarsRequest(
+                symbol_or_symbols=symbols,
+                timeframe=TimeFrame.Minute,
+                start=end_time - self.lookback,
+                end=end_time
+            )
+            bars = self.client.get_crypto_bars(request)
+        except Exception as e:
+            if len(symbols) == 1:
+                logger.warning(f"Failed to get crypto bars for {symbols}: {e}")
+                return {}
+            logger.warning(f"Batched crypto bars request for {symbols} failed, retrying per symbol: {e}")
+            self._last_request = time.monotonic()
+            results = {}
+            for symbol in symbols:
+                results.update(self._fetch([symbol]))
+            return results
+        finally:
+            self._last_request = time.monotonic()
+
+        results = {}
+        for symbol in symbols:
+            data = self._extract(bars, symbol)
+            if data:
+                results[symbol] = data
+            else:
+                logger.warning(f"No data returned for symbol: {symbol}")
+        return results
+
+    def _extract(self, bars, symbol: str):
+        """Bars for `symbol` from a BarSet, reusing the accessor that worked last time"""
+        if self._accessor is not None:
+            try:
+                return self._accessor(bars, symbol)
+            except (AttributeError, KeyError, TypeError):
+                self._accessor = None
+
+        for accessor in BARSET_ACCESSORS:
+            try:
+                data = accessor(bars, symbol)
+            except (AttributeError, KeyError, TypeError):
+                continue
+            if data:
+                self._accessor = accessor
+                return data
+        return None
+
+# Global bars cache instance
+bars_cache = BarsCache()
@@ -1,3 +1,4 @@
+from sqlalchemy import func, case
 from sqlalchemy.orm import Session
 from database.models import Strategy, Trade, Position, PerformanceMetric
 from datetime import datetime, timedelta
@@ -7,25 +8,30 @@ from typing import List, Dict, Optional
 
 class PerformanceService:
     
-    def calculate_strategy_performance(self, strategy_id: int, db: Session) -> Dict:
-        """Calculate comprehensive performance metrics for a strategy"""
-        strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
+    def calculate_strategy_performance(self, strategy_id: int, db: Session,
+                                       strategy: Optional[Strategy] = None) -> Dict:
+        """Calculate comprehensive performance metrics for a strategy.
+        
+        Callers that already hold the strategy row can pass it to skip reloading it.
+        """
+        if strategy is None:
+            strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
         if not strategy:
             raise ValueError("Strategy not found")
         
-        trades = db.query(Trade).filter(
+        # Trade counts and realized P&L aggregated in the database
+        total_trades, winning_trades, losing_trades, total_realized_pnl = db.query(
+            func.count(Trade.id),
+            func.count(case((Trade.realized_pnl > 0, 1))),
+            func.count(case((Trade.realized_pnl < 0, 1))),
+            func.coalesce(func.sum(Trade.realized_pnl), 0.0)
+        ).filter(
             Trade.strategy_id == strategy_id,
             Trade.status == "filled"
-        ).order_by(Trade.executed_at).all()
+        ).one()
         
         positions = db.query(Position).filter(Position.strategy_id == strategy_id).all()
         
-        # Calculate basic metrics
-        total_trades = len(trades)
-        winning_trades = len([t for t in trades if t.realized_pnl > 0])
-        losing_trades = len([t for t in trades if t.realized_pnl < 0])
-        
-        total_realized_pnl = sum(t.realized_pnl for t in trades)
         total_unrealized_pnl = sum(p.unrealized_pnl for p in positions)
         total_pnl = total_realized_pnl + total_unrealized_pnl
         
@@ -124,12 +130,38 @@ class PerformanceService:
             "volatility": round(volatility * 100, 2)  # Convert to percentage
         }
     
-    def update_daily_performance(self, strategy_id: int, db: Session):
-        """Update daily performance metrics (called daily by scheduler)"""
+    def update_daily_performance(self, strategy_id: int, db: Session, commit: bool = True):
+        """Update daily performance metrics (called daily by scheduler).
+        
+        With commit=False the changes are left for the caller's commit.
+        """
         strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
         if not strategy:
             return
         
+        self._persist_daily_metric(strategy, self.calculate_strategy_performance(strategy_id, db), db)
+        if commit:
+            db.commit()
+    
+    def compute_and_persist(self, strategy_id: int, db: Session, persist_daily: bool = True,
+                            commit: bool = True, strategy: Optional[Strategy] = None) -> Dict:
+        """Calculate performance once and, if persist_daily, write today's metric row from it.
+        
+        Replaces calling calculate_strategy_performance and update_daily_performance
+        back to back, which computes the same metrics twice.
+        """
+        if strategy is None:
+            strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
+        performance = self.calculate_strategy_performance(strategy_id, db, strategy=strategy)
+        if persist_daily:
+            self._persist_daily_metric(strategy, performance, db)
+            if commit:
+                db.commit()
+        return performance
+    
+    def _persist_daily_metric(self, strategy: Strategy, performance: Dict, db: Session):
+        """Create or update today's PerformanceMetric row from computed performance"""
+        strategy_id = strategy.id
         today = datetime.utcnow().date()
         
         # Check if today's metrics already exist
@@ -138,9 +170,6 @@ class PerformanceService:
             PerformanceMetric.date == today
         ).first()
         
-        # Calculate current performance
-        performance = self.calculate_strategy_performance(strategy_id, db)
-        
         # Get yesterday's metrics for daily P&L calculation
         yesterday = today - timedelta(days=1)
         yesterday_metric = db.query(PerformanceMetric).filter(
@@ -176,8 +205,6 @@ class PerformanceService:
                 win_rate=performance["win_rate"]
             )
             db.add(new_metric)
-        
-        db.commit()
     
     def get_portfolio_breakdown(self, strategy_id: int, db: Session) -> List[Dict]:
         """Get current portfolio breakdown by symbol"""
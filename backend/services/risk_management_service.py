@@ -1,13 +1,16 @@
 import logging
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from database.models import Strategy, Position, Trade, PerformanceMetric
-from services.trading_service import TradingService
 from alpaca.trading.enums import OrderSide
 
+if TYPE_CHECKING:
+    # TradingService imports this module, so only import it for type hints
+    from services.trading_service import TradingService
+
 logger = logging.getLogger(__name__)
 
 class RiskAlert:
@@ -20,7 +23,7 @@ class RiskAlert:
         self.data = data or {}
 
 class RiskManagementService:
-    def __init__(self, trading_service: TradingService):
+    def __init__(self, trading_service: "TradingService"):
         self.trading_service = trading_service
         self.logger = logging.getLogger(__name__)
         
@@ -58,7 +61,8 @@ class RiskManagementService:
             return self.default_limits
     
     def calculate_position_size(self, strategy_id: int, symbol: str, entry_price: float, 
-                              stop_loss_price: float, db: Session) -> Tuple[int, List[RiskAlert]]:
+                              stop_loss_price: float, db: Session,
+                              portfolio_value: Optional[float] = None) -> Tuple[int, List[RiskAlert]]:
         """Calculate safe position size based on risk management rules"""
         alerts = []
         
@@ -109,7 +113,8 @@ class RiskManagementService:
                 return 0, alerts
             
             # Validate against current portfolio
-            portfolio_value = self.calculate_portfolio_value(strategy_id, db)
+            if portfolio_value is None:
+                portfolio_value = self.calculate_portfolio_value(strategy_id, db)
             position_value = position_size * entry_price
             position_percentage = (position_value / portfolio_value) * 100 if portfolio_value > 0 else 0
             
@@ -308,6 +313,87 @@ class RiskManagementService:
             self.logger.error(f"Error validating trade: {e}")
             return False, [RiskAlert("error", "critical", f"Trade validation error: {str(e)}", strategy_id)]
     
+    def validate_trades(self, orders: List[Dict], db: Session) -> List[Tuple[bool, List[RiskAlert]]]:
+        """Validate a batch of trades (dicts with strategy_id, symbol, side, quantity, price).
+        
+        Strategy-level checks and portfolio values are computed once per strategy
+        rather than once per order. Returns one (is_valid, alerts) tuple per order.
+        """
+        try:
+            strategy_ids = {order["strategy_id"] for order in orders}
+            
+            # One grouped query for the position value of every strategy in the batch
+            position_values = dict(
+                db.query(Position.strategy_id, func.sum(Position.market_value))
+                .filter(Position.strategy_id.in_(strategy_ids))
+                .group_by(Position.strategy_id)
+                .all()
+            )
+            capitals = dict(
+                db.query(Strategy.id, Strategy.current_capital)
+                .filter(Strategy.id.in_(strategy_ids))
+                .all()
+            )
+            
+            strategy_checks = {}
+            for strategy_id in strategy_ids:
+                strategy_checks[strategy_id] = {
+                    "halt": self.check_strategy_halt_conditions(strategy_id, db),
+                    "daily": self.check_daily_loss_limits(strategy_id, db),
+                    "drawdown": self.check_drawdown_limits(strategy_id, db),
+                    "portfolio_value": (
+                        capitals[strategy_id] + (position_values.get(strategy_id) or 0.0)
+                        if strategy_id in capitals else 0.0
+                    )
+                }
+            
+            results = []
+            for order in orders:
+                strategy_id = order["strategy_id"]
+                checks = strategy_checks[strategy_id]
+                alerts = []
+                
+                if any(alert.severity == "critical" for alert in checks["halt"]):
+                    results.append((False, checks["halt"]))
+                    continue
+                
+                if order["side"] == OrderSide.BUY:
+                    max_size, size_alerts = self.calculate_position_size(
+                        strategy_id, order["symbol"], order["price"], 0, db,
+                        portfolio_value=checks["portfolio_value"]
+                    )
+                    alerts.extend(size_alerts)
+                    
+                    if order["quantity"] > max_size:
+                        alerts.append(RiskAlert(
+                            "position_size", "high", 
+                            f"Trade size {order['quantity']} exceeds maximum {max_size}", 
+                            strategy_id
+                        ))
+                        results.append((False, alerts))
+                        continue
+                
+                alerts.extend(checks["daily"])
+                if any(alert.alert_type == "daily_loss" and alert.severity == "critical" for alert in checks["daily"]):
+                    results.append((False, alerts))
+                    continue
+                
+                alerts.extend(checks["drawdown"])
+                if any(alert.alert_type == "drawdown" and alert.severity == "critical" for alert in checks["drawdown"]):
+                    results.append((False, alerts))
+                    continue
+                
+                results.append((True, alerts))
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Error validating trades: {e}")
+            return [
+                (False, [RiskAlert("error", "critical", f"Trade validation error: {str(e)}", order["strategy_id"])])
+                for order in orders
+            ]
+    
     def check_strategy_halt_conditions(self, strategy_id: int, db: Session) -> List[RiskAlert]:
         """Check if strategy should be automatically halted"""
         alerts = []
@@ -0,0 +1,97 @@
+import os
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class SharedCache:
+    """Redis-backed cache shared by every worker/replica.
+
+    Enabled by setting REDIS_URL; without it (or without the redis package)
+    every method is a cheap no-op and callers fall through to Alpaca.
+    """
+
+    def __init__(self):
+        self.redis_url = os.getenv("REDIS_URL")
+        self.ttl = int(os.getenv("SHARED_CACHE_TTL", "1"))
+        self.client = None
+
+        if self.redis_url:
+            try:
+                import redis
+                import orjson
+                self.client = redis.Redis.from_url(self.redis_url)
+                self._dumps = orjson.dumps
+                self._loads = orjson.loads
+                logger.info(f"Shared cache enabled at {self.redis_url}")
+            except ImportError as e:
+                logger.warning(f"REDIS_URL is set but redis/orjson is not installed: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Return the cached values for whichever keys are present"""
+        if not self.enabled or not keys:
+            return {}
+        try:
+            values = self.client.mget(keys)
+            return {key: self._loads(value) for key, value in zip(keys, values) if value is not None}
+        except Exception as e:
+            logger.error(f"Shared cache read failed: {e}")
+            return {}
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, values: Dict[str, Any]):
+        """Store values with the shared TTL in one pipelined round-trip"""
+        if not self.enabled or not values:
+            return
+        try:
+            pipeline = self.client.pipeline()
+            for key, value in values.items():
+                pipeline.setex(key, self.ttl, self._dumps(value))
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"Shared cache write failed: {e}")
+
+    def set(self, key: str, value: Any):
+        self.set_many({key: value})
+
+    def delete(self, *keys: str):
+        if not self.enabled or not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except Exception as e:
+            logger.error(f"Shared cache delete failed: {e}")
+
+    def acquire_fetch_lock(self, key: str) -> bool:
+        """Claim the right to refill `key` (SET NX EX) so only one worker hits Alpaca.
+
+        Always True when the cache is disabled or unreachable.
+        """
+        if not self.enabled:
+            return True
+        try:
+            return bool(self.client.set(f"lock:{key}", b"1", nx=True, ex=self.ttl))
+        except Exception as e:
+            logger.error(f"Shared cache lock failed: {e}")
+            return True
+
+    def wait_for(self, keys: List[str], timeout: float = 0.2, interval: float = 0.05) -> Dict[str, Any]:
+        """Briefly poll for values another worker is fetching"""
+        deadline = time.monotonic() + timeout
+        found = {}
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            found = self.get_many(keys)
+            if len(found) == len(keys):
+                break
+        return found
+
+# Global shared cache instance
+shared_cache = SharedCache()
@@ -1,33 +1,111 @@
+import atexit
 import json
 import logging
+import os
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any, Optional
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from database.models import StrategyEventLog, EventLogLevel
 
 logger = logging.getLogger(__name__)
 
+# Session.info flag set by StrategyEventLogger.batched
+DEFER_COMMIT_KEY = "defer_event_commits"
+
+# High-volume per-tick events are buffered and bulk-inserted in the background
+EVENT_BUFFER_SIZE = 500  # oldest events are dropped beyond this if flushing falls behind
+EVENT_FLUSH_SIZE = 100  # flush right away once this many events are waiting
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "2.0"))
+
+class StrategyEventBuffer:
+    """Bounded in-memory queue of event rows written in bulk by a background flusher"""
+    
+    def __init__(self, maxlen: int = EVENT_BUFFER_SIZE, flush_size: int = EVENT_FLUSH_SIZE,
+                 flush_interval: float = EVENT_FLUSH_INTERVAL):
+        self._events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._flusher = None
+    
+    def append(self, db: Session, row: Dict[str, Any]):
+        """Queue an event row for the database `db` is bound to"""
+        # Keep the engine rather than the session, which is closed long before the flush
+        bind = db.get_bind()
+        with self._lock:
+            self._events.append((getattr(bind, "engine", bind), row))
+            should_flush = len(self._events) >= self._flush_size
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, daemon=True, name="StrategyEventFlusher")
+                self._flusher.start()
+                atexit.register(self.close)
+        if should_flush:
+            self.flush()
+    
+    def flush(self):
+        """Write every queued event as one Core executemany INSERT per database"""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        if not events:
+            return
+        
+        rows_by_bind = defaultdict(list)
+        for bind, row in events:
+            rows_by_bind[bind].append(row)
+        for bind, rows in rows_by_bind.items():
+            try:
+                # One prepared statement for the whole batch, no ORM unit of work
+                with bind.begin() as connection:
+                    connection.execute(insert(StrategyEventLog.__table__), rows)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(rows)} strategy events: {e}")
+    
+    def close(self):
+        """Stop the background flusher and write whatever is left"""
+        self._stop.set()
+        self.flush()
+    
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
 class StrategyEventLogger:
     """Service for logging strategy events and activities"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.buffer = StrategyEventBuffer()
     
     def log_event(self, db: Session, strategy_id: int, level: EventLogLevel, 
-                  event_type: str, message: str, details: Dict[str, Any] = None):
-        """Log a strategy event to the database"""
+                  event_type: str, message: str, details: Dict[str, Any] = None,
+                  buffered: bool = False):
+        """Log a strategy event to the database.
+        
+        Buffered events are queued and written in bulk by the background
+        flusher instead of being added to `db`.
+        """
         try:
-            event_log = StrategyEventLog(
-                strategy_id=strategy_id,
-                level=level,
-                event_type=event_type,
-                message=message,
-                details=json.dumps(details) if details else None,
-                timestamp=datetime.utcnow()
-            )
+            event_row = {
+                "strategy_id": strategy_id,
+                "level": level,
+                "event_type": event_type,
+                "message": message,
+                "details": json.dumps(details) if details else None,
+                "timestamp": datetime.utcnow()
+            }
             
-            db.add(event_log)
-            db.commit()
+            if buffered:
+                self.buffer.append(db, event_row)
+            else:
+                db.add(StrategyEventLog(**event_row))
+                if not db.info.get(DEFER_COMMIT_KEY):
+                    db.commit()
             
             # Also log to application logger
             log_level = {
@@ -43,6 +121,25 @@ class StrategyEventLogger:
         except Exception as e:
             self.logger.error(f"Failed to log strategy event: {e}")
     
+    def flush_buffered(self):
+        """Write all buffered events now (e.g. on shutdown)"""
+        self.buffer.flush()
+    
+    @contextmanager
+    def batched(self, db: Session):
+        """Defer event commits on `db` so everything logged inside the block
+        is written by one commit at the end (even if the block raises)"""
+        db.info[DEFER_COMMIT_KEY] = True
+        try:
+            yield
+        finally:
+            db.info.pop(DEFER_COMMIT_KEY, None)
+            try:
+                db.commit()
+            except Exception as e:
+                self.logger.error(f"Failed to commit batched strategy events: {e}")
+                db.rollback()
+    
     def log_debug(self, db: Session, strategy_id: int, event_type: str, message: str, details: Dict = None):
         """Log a debug event"""
         self.log_event(db, strategy_id, EventLogLevel.DEBUG, event_type, message, details)
@@ -83,7 +180,7 @@ class StrategyEventLogger:
         if details:
             log_details.update(details)
             
-        self.log_info(db, strategy_id, "trade_check", message, log_details)
+        self.log_event(db, strategy_id, EventLogLevel.INFO, "trade_check", message, log_details, buffered=True)
     
     def log_signal_generated(self, db: Session, strategy_id: int, symbol: str, signal: str, 
                            confidence: float = None, details: Dict = None):
@@ -154,7 +251,16 @@ class StrategyEventLogger:
     def log_performance_update(self, db: Session, strategy_id: int, metrics: Dict):
         """Log performance metrics update"""
         message = f"Performance updated - ROI: {metrics.get('roi', 0):.2f}%, P&L: ${metrics.get('pnl', 0):.2f}"
-        self.log_debug(db, strategy_id, "performance_update", message, metrics)
+        self.log_event(db, strategy_id, EventLogLevel.DEBUG, "performance_update", message, metrics, buffered=True)
+    
+    def log_account_sync(self, db: Session, strategy_id: int, details: Dict):
+        """Log a periodic capital sync with the Alpaca account"""
+        if details.get("sync_success"):
+            message = f"Capital synced with Alpaca account: ${details.get('capital', 0):.2f}"
+            self.log_event(db, strategy_id, EventLogLevel.INFO, "account_sync", message, details, buffered=True)
+        else:
+            self.log_event(db, strategy_id, EventLogLevel.WARN, "account_sync",
+                           "Capital sync with Alpaca account failed", details, buffered=True)
     
     def log_market_data_fetch(self, db: Session, strategy_id: int, symbols: list, success: bool = True, error: str = None):
         """Log market data fetch attempt"""
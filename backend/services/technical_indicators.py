@@ -12,6 +12,107 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Numba is optional (`pip install numba`); without it the kernels below run as plain NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True)
+def ma_crossover(close: np.ndarray, short_n: int, long_n: int) -> Tuple[float, float, bool]:
+    """Latest short/long moving averages of `close` and whether the BUY crossover holds.
+
+    Like pandas rolling(n).mean(), an MA with fewer than n bars is NaN (and never signals).
+    """
+    n = close.size
+    short_ma = close[n - short_n:].mean() if short_n <= n else np.nan
+    long_ma = close[n - long_n:].mean() if long_n <= n else np.nan
+    return short_ma, long_ma, short_ma > long_ma and close[-1] > short_ma
+
+def volume_ok(volume: np.ndarray, min_volume: float, paper_trading: bool) -> np.ndarray:
+    """Per-bar volume filter: at least min_volume, or zero volume in paper trading
+    (paper feeds often report 0, so those bars are let through)"""
+    ok = volume >= min_volume
+    if paper_trading:
+        ok |= volume == 0
+    return ok
+
+# Order of the values returned by ai_indicators
+AI_INDICATOR_FIELDS = (
+    'short_ma', 'long_ma', 'rsi', 'bb_upper', 'bb_lower', 'bb_middle', 'avg_volume', 'volume_ratio'
+)
+
+def _ratio(num: float, den: float) -> float:
+    """num / den with NumPy semantics (inf or NaN) instead of ZeroDivisionError"""
+    if den != 0.0:
+        return num / den
+    if num != 0.0:
+        return np.inf if num > 0.0 else -np.inf
+    return np.nan
+
+if NUMBA_AVAILABLE:
+    _ratio = njit(cache=True)(_ratio)
+
+@njit(cache=True)
+def ai_indicators(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Latest MA3/MA5, 14-bar RSI, 20-bar Bollinger bands and 10-bar volume stats,
+    in AI_INDICATOR_FIELDS order; NaN where there are too few bars"""
+    n = close.size
+    out = np.full(8, np.nan)
+    if n >= 3:
+        out[0] = close[n - 3:].mean()
+    if n >= 5:
+        out[1] = close[n - 5:].mean()
+    
+    # With exactly 14 bars the window holds 13 changes, still averaged over 14
+    if n >= 14:
+        gain = 0.0
+        loss = 0.0
+        for i in range(max(1, n - 14), n):
+            d = close[i] - close[i - 1]
+            if d > 0.0:
+                gain += d
+            else:
+                loss -= d
+        out[2] = 100.0 - 100.0 / (1.0 + _ratio(gain / 14.0, loss / 14.0))
+    
+    if n >= 20:
+        mean = close[n - 20:].mean()
+        var = 0.0
+        for i in range(n - 20, n):
+            var += (close[i] - mean) ** 2
+        std = np.sqrt(var / 19.0)
+        out[3] = mean + std * 2.0
+        out[4] = mean - std * 2.0
+        out[5] = mean
+    
+    if n >= 10:
+        out[6] = volume[n - 10:].mean()
+        out[7] = _ratio(volume[n - 1], out[6])
+    return out
+
+def rolling_mean(x: np.ndarray, n: int) -> np.ndarray:
+    """Trailing n-period mean via cumulative-sum differences, NaN for the first n-1 values"""
+    out = np.full(x.size, np.nan)
+    if n <= 0 or x.size < n:
+        return out
+    c = np.empty(x.size + 1)
+    c[0] = 0.0
+    np.cumsum(x, out=c[1:])
+    out[n - 1:] = (c[n:] - c[:-n]) / n
+    return out
+
+if NUMBA_AVAILABLE:
+    # Compile (or load from cache) at import so the first strategy tick doesn't pay for it
+    ma_crossover(np.ones(2, dtype=np.float64), 1, 2)
+    ai_indicators(np.ones(2, dtype=np.float64), np.ones(2, dtype=np.float64))
+
 class TechnicalIndicators:
     """
     Collection of advanced technical indicators for trading strategies
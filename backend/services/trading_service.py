@@ -3,68 +3,233 @@ from alpaca.data.historical import StockHistoricalDataClient, CryptoHistoricalDa
 from alpaca.data.requests import StockLatestQuoteRequest, CryptoLatestQuoteRequest, StockBarsRequest, CryptoBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.requests import MarketOrderRequest, GetOrdersRequest
-from alpaca.trading.enums import OrderSide, TimeInForce, OrderStatus
-from sqlalchemy.orm import Session
+from alpaca.trading.enums import OrderSide, TimeInForce, OrderStatus, QueryOrderStatus
+from sqlalchemy import update, bindparam, func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from database.models import Strategy, Position, Trade, PerformanceMetric
 from database.database import get_db
+from services.risk_management_service import RiskManagementService
+from services.shared_cache import shared_cache
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
+from typing import List
+import asyncio
 import logging
 import os
+import time
+import orjson
+import requests
 
 logger = logging.getLogger(__name__)
 
+# Fallback prices used when Alpaca quotes are unavailable
+FALLBACK_PRICES = {
+    'BTC/USD': 75000.0,
+    'BTCUSD': 75000.0,
+    'AAPL': 185.0,
+    'TSLA': 260.0,
+    'SPY': 460.0,
+    'MSFT': 350.0,
+    'F': 11.00
+}
+STOCK_FALLBACK_PRICES = {'AAPL': 185, 'TSLA': 260, 'SPY': 460, 'MSFT': 350, 'F': 11.00}
+
+CRYPTO_SYMBOLS = frozenset({'BTC/USD', 'ETH/USD', 'BTCUSD', 'ETHUSD'})
+# Alpaca expects crypto quotes in BTC/USD format
+CRYPTO_NORMALIZE = {'BTCUSD': 'BTC/USD', 'ETHUSD': 'ETH/USD'}
+
+# How long get_account_info may serve a cached response (seconds)
+ACCOUNT_INFO_TTL = float(os.getenv("ACCOUNT_INFO_TTL", "1.0"))
+
+# Dialect-specific INSERT constructs that support ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert
+}
+
+# Max pending trades one update_filled_orders pass claims
+PENDING_TRADES_BATCH_SIZE = 500
+
+# Fill polling backs off while a strategy has no pending trades: the interval
+# doubles after each empty poll up to the max and resets when an order is placed
+FILL_POLL_MIN_INTERVAL = float(os.getenv("FILL_POLL_MIN_INTERVAL", "1.0"))
+FILL_POLL_MAX_INTERVAL = float(os.getenv("FILL_POLL_MAX_INTERVAL", "30.0"))
+
+# How long update_positions skips re-syncing when no order was placed since (seconds)
+POSITION_SYNC_INTERVAL = float(os.getenv("POSITION_SYNC_INTERVAL", "5.0"))
+
+# Backoff state is process-wide: orders go through the strategy runners' TradingService
+# instances, and their resets must reach whichever instance polls fills/positions
+_FILL_POLL_STATE = {}  # strategy_id -> (monotonic next poll time, interval)
+_POSITION_SYNCED_AT = {}  # strategy_id -> monotonic time of last position sync
+
+# How long get_latest_quotes may serve a cached quote (seconds)
+QUOTE_TTL = float(os.getenv("QUOTE_TTL", "1.0"))
+
+# How often the background price refresher re-quotes tracked symbols (seconds)
+PRICE_REFRESH_INTERVAL = float(os.getenv("PRICE_REFRESH_INTERVAL", "2.0"))
+
+# Tracked symbols not read within this many refresh intervals stop being refreshed
+PRICE_TRACK_EXPIRY_INTERVALS = int(os.getenv("PRICE_TRACK_EXPIRY_INTERVALS", "30"))
+
+# Prices kept fresh by the background refresher are process-wide, so the strategy
+# runners' TradingService instances read the cache the API instance refreshes
+_PRICE_CACHE = {}  # symbol -> latest price
+_TRACKED_SYMBOLS = {}  # symbol -> monotonic time the price was last read
+_PRICE_REFRESH_TASK = None
+
+# Alpaca clients are process-wide singletons so every TradingService shares
+# one keep-alive HTTP session per client
+@lru_cache(maxsize=1)
+def get_trading_client() -> TradingClient:
+    return TradingClient(
+        api_key=os.getenv("ALPACA_API_KEY"),
+        secret_key=os.getenv("ALPACA_SECRET_KEY"),
+        paper=True  # Paper trading
+    )
+
+@lru_cache(maxsize=1)
+def get_stock_data_client() -> StockHistoricalDataClient:
+    return StockHistoricalDataClient(
+        api_key=os.getenv("ALPACA_API_KEY"),
+        secret_key=os.getenv("ALPACA_SECRET_KEY")
+    )
+
+@lru_cache(maxsize=1)
+def get_crypto_data_client() -> CryptoHistoricalDataClient:
+    return CryptoHistoricalDataClient(
+        api_key=os.getenv("ALPACA_API_KEY"),
+        secret_key=os.getenv("ALPACA_SECRET_KEY")
+    )
+
+# Direct REST endpoint for plain market orders (see _submit_market_order)
+ORDERS_URL = "https://paper-api.alpaca.markets/v2/orders"  # Paper trading
+ORDER_REQUEST_TIMEOUT = 10
+
+@lru_cache(maxsize=1)
+def get_orders_http_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({
+        "APCA-API-KEY-ID": os.getenv("ALPACA_API_KEY") or "",
+        "APCA-API-SECRET-KEY": os.getenv("ALPACA_SECRET_KEY") or "",
+        "Content-Type": "application/json"
+    })
+    return session
+
+# Fields copied from each Alpaca bar into the market-data response
+BAR_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+_get_bar_fields = attrgetter(*BAR_FIELDS)
+
+def _price_refresh_running() -> bool:
+    return _PRICE_REFRESH_TASK is not None and not _PRICE_REFRESH_TASK.done()
+
+# Shared pool for fanning out independent quote requests on the sync path
+QUOTE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="quotes")
+
 class TradingService:
     def __init__(self):
-        self.trading_client = TradingClient(
-            api_key=os.getenv("ALPACA_API_KEY"),
-            secret_key=os.getenv("ALPACA_SECRET_KEY"),
-            paper=True  # Paper trading
-        )
-        self.stock_data_client = StockHistoricalDataClient(
-            api_key=os.getenv("ALPACA_API_KEY"),
-            secret_key=os.getenv("ALPACA_SECRET_KEY")
-        )
-        self.crypto_data_client = CryptoHistoricalDataClient(
-            api_key=os.getenv("ALPACA_API_KEY"),
-            secret_key=os.getenv("ALPACA_SECRET_KEY")
-        )
-
-    def get_current_price(self, symbol: str) -> float:
-        """Get current market price for a symbol"""
+        self.trading_client = get_trading_client()
+        self.stock_data_client = get_stock_data_client()
+        self.crypto_data_client = get_crypto_data_client()
+        self._risk_service = RiskManagementService(self)
+        self._account_ttl = ACCOUNT_INFO_TTL
+        self._account_cache = (0.0, None)  # (monotonic fetch time, account dict)
+        self._quote_ttl = QUOTE_TTL
+        self._quote_cache = {}  # symbol -> (monotonic fetch time, quote dict)
+        self._fill_poll_state = _FILL_POLL_STATE
+        self._position_synced_at = _POSITION_SYNCED_AT
+        self._refresh_interval = PRICE_REFRESH_INTERVAL
+
+    def start_price_refresh(self):
+        """Start the shared background task that keeps tracked symbol prices fresh.
+        
+        Must be called from a running event loop (e.g. FastAPI startup). Only one
+        refresher runs per process, whichever instance starts it.
+        """
+        global _PRICE_REFRESH_TASK
+        if not _price_refresh_running():
+            _PRICE_REFRESH_TASK = asyncio.create_task(self._price_refresh_loop())
+
+    def stop_price_refresh(self):
+        """Cancel the background price refresher"""
+        global _PRICE_REFRESH_TASK
+        if _PRICE_REFRESH_TASK is not None:
+            _PRICE_REFRESH_TASK.cancel()
+            _PRICE_REFRESH_TASK = None
+
+    async def _price_refresh_loop(self):
+        while True:
+            try:
+                await self._refresh_all_tracked()
+            except Exception as e:
+                logger.error(f"Error refreshing tracked prices: {e}")
+            await asyncio.sleep(self._refresh_interval)
+
+    async def _refresh_all_tracked(self):
+        """Re-quote every tracked symbol (one crypto + one stock request).
+        
+        Symbols nobody has read for PRICE_TRACK_EXPIRY_INTERVALS refreshes are dropped.
+        """
+        cutoff = time.monotonic() - PRICE_TRACK_EXPIRY_INTERVALS * self._refresh_interval
+        for symbol, last_read in list(_TRACKED_SYMBOLS.items()):
+            if last_read < cutoff:
+                _TRACKED_SYMBOLS.pop(symbol, None)
+                _PRICE_CACHE.pop(symbol, None)
+        if not _TRACKED_SYMBOLS:
+            return
+        quotes = await asyncio.to_thread(self._fetch_quotes, list(_TRACKED_SYMBOLS))
+        self._store_quotes(quotes)
+        shared_cache.set_many({f"quote:{symbol}": quote for symbol, quote in quotes.items()})
+        for symbol, quote in quotes.items():
+            if symbol in _TRACKED_SYMBOLS:
+                _PRICE_CACHE[symbol] = quote['price']
+
+    def get_current_price(self, symbol: str, track: bool = False) -> float:
+        """Get current market price for a symbol.
+        
+        Strategy order paths pass track=True so the background refresher keeps the
+        price warm; one-off lookups (e.g. the debug endpoint) are not tracked.
+        """
+        if track or symbol in _TRACKED_SYMBOLS:
+            _TRACKED_SYMBOLS[symbol] = time.monotonic()
+        
+        # While the refresher runs, the cache is kept fresh and is the source of truth
+        if _price_refresh_running() and symbol in _PRICE_CACHE:
+            return _PRICE_CACHE[symbol]
+        
         try:
             quotes = self.get_latest_quotes([symbol])
             if symbol in quotes:
+                if symbol in _TRACKED_SYMBOLS:
+                    _PRICE_CACHE[symbol] = quotes[symbol]['price']
                 return quotes[symbol]['price']
             else:
-                # Fallback prices
-                fallback_prices = {
-                    'BTC/USD': 75000.0,
-                    'BTCUSD': 75000.0,
-                    'AAPL': 185.0,
-                    'TSLA': 260.0,
-                    'SPY': 460.0,
-                    'MSFT': 350.0,
-                    'F': 11.00
-                }
-                return fallback_prices.get(symbol, 100.0)
+                return FALLBACK_PRICES.get(symbol, 100.0)
         except Exception as e:
             logger.error(f"Error getting current price for {symbol}: {e}")
             return 100.0  # Fallback price
 
     def place_order(self, strategy_id: int, symbol: str, side: OrderSide, quantity: float, db: Session, 
-                   price: float = None, validate_risk: bool = True):
-        """Place an order with optional risk validation"""
+                   price: float = None, validate_risk: bool = True, commit: bool = True):
+        """Place an order with optional risk validation.
+        
+        With commit=False the trade is only flushed (so trade.id is set); batch
+        callers commit once after placing all of their orders.
+        """
         try:
-            # Get current market price if not provided
-            if price is None:
-                price = self.get_current_price(symbol)
+            # Risk checks need a price; otherwise leave it unset and let
+            # update_filled_orders record the actual fill price
+            if price is None and validate_risk:
+                price = self.get_current_price(symbol, track=True)
             
             # Risk validation if enabled
             if validate_risk:
-                from services.risk_management_service import RiskManagementService
-                risk_service = RiskManagementService(self)
-                
-                is_valid, alerts = risk_service.validate_trade(
+                is_valid, alerts = self._risk_service.validate_trade(
                     strategy_id, symbol, side, int(quantity), price, db
                 )
                 
@@ -80,237 +245,519 @@ class TradingService:
                     if alert.severity in ["high", "medium"]:
                         logger.warning(f"Risk warning: {alert.message}")
             
-            # Create Alpaca order
-            order_request = MarketOrderRequest(
-                symbol=symbol,
-                qty=quantity,
-                side=side,
-                time_in_force=TimeInForce.DAY
-            )
-            
-            alpaca_order = self.trading_client.submit_order(order_request)
+            alpaca_order = self._submit_market_order(symbol, quantity, side)
+            self._invalidate_account_cache()
+            self._reset_sync_backoff(strategy_id)
+            quote_key = CRYPTO_NORMALIZE.get(symbol, symbol)
+            self._quote_cache.pop(quote_key, None)
+            shared_cache.delete(f"quote:{quote_key}")
             
             # Record trade in database
             trade = Trade(
                 strategy_id=strategy_id,
-                alpaca_order_id=alpaca_order.id,
+                alpaca_order_id=alpaca_order["id"],
                 symbol=symbol,
                 side=side.value,
                 quantity=quantity,
                 price=price,
-                status=alpaca_order.status,
-                created_at=datetime.utcnow()
+                status=alpaca_order["status"]
             )
             
             db.add(trade)
-            db.commit()
+            if commit:
+                db.commit()
+            else:
+                db.flush()
             
-            logger.info(f"Order placed: {symbol} {side.value} {quantity} shares at ${price}")
+            price_description = f"${price}" if price is not None else "market"
+            logger.info(f"Order placed: {symbol} {side.value} {quantity} shares at {price_description}")
             return trade
             
         except Exception as e:
             logger.error(f"Error placing order: {e}")
             raise
 
-    def update_positions(self, strategy_id: int, db: Session):
-        """Sync positions from Alpaca to database"""
+    def _submit_market_order(self, symbol: str, quantity: float, side: OrderSide) -> dict:
+        """POST a plain market/day order straight to the REST endpoint.
+        
+        Skips the SDK's pydantic request/response models on the hot order path;
+        other order types still go through trading_client.submit_order.
+        """
+        response = get_orders_http_session().post(ORDERS_URL, data=orjson.dumps({
+            "symbol": symbol,
+            "qty": str(quantity),
+            "side": side.value,
+            "type": "market",
+            "time_in_force": TimeInForce.DAY.value
+        }), timeout=ORDER_REQUEST_TIMEOUT)
+        if not response.ok:
+            raise requests.HTTPError(
+                f"Alpaca order rejected ({response.status_code}): {response.text}",
+                response=response
+            )
+        return orjson.loads(response.content)
+
+    def update_positions(self, strategy_id: int, db: Session, force: bool = False):
+        """Sync positions from Alpaca to database.
+        
+        Skipped when the last sync was under POSITION_SYNC_INTERVAL ago and no
+        order has been placed since, unless `force` is set.
+        """
         try:
+            synced_at = self._position_synced_at.get(strategy_id)
+            if not force and synced_at is not None and time.monotonic() - synced_at < POSITION_SYNC_INTERVAL:
+                return
+            
             alpaca_positions = self.trading_client.get_all_positions()
+            self._position_synced_at[strategy_id] = time.monotonic()
+            if not alpaca_positions:
+                return
             
-            for alpaca_pos in alpaca_positions:
-                # Check if position exists in DB
-                existing_pos = db.query(Position).filter(
-                    Position.strategy_id == strategy_id,
-                    Position.symbol == alpaca_pos.symbol
-                ).first()
-                
-                if existing_pos:
-                    # Update existing position
-                    existing_pos.quantity = float(alpaca_pos.qty)
-                    existing_pos.avg_price = float(alpaca_pos.avg_entry_price)
-                    existing_pos.current_price = float(alpaca_pos.current_price)
-                    existing_pos.market_value = float(alpaca_pos.market_value)
-                    existing_pos.unrealized_pnl = float(alpaca_pos.unrealized_pl)
-                    existing_pos.updated_at = datetime.utcnow()
-                else:
-                    # Create new position
-                    new_pos = Position(
-                        strategy_id=strategy_id,
-                        symbol=alpaca_pos.symbol,
-                        quantity=float(alpaca_pos.qty),
-                        avg_price=float(alpaca_pos.avg_entry_price),
-                        current_price=float(alpaca_pos.current_price),
-                        market_value=float(alpaca_pos.market_value),
-                        unrealized_pnl=float(alpaca_pos.unrealized_pl),
-                        side="long" if float(alpaca_pos.qty) > 0 else "short"
-                    )
-                    db.add(new_pos)
+            rows = [
+                {
+                    "strategy_id": strategy_id,
+                    "symbol": alpaca_pos.symbol,
+                    "quantity": float(alpaca_pos.qty),
+                    "avg_price": float(alpaca_pos.avg_entry_price),
+                    "current_price": float(alpaca_pos.current_price),
+                    "market_value": float(alpaca_pos.market_value),
+                    "unrealized_pnl": float(alpaca_pos.unrealized_pl),
+                    "side": "long" if float(alpaca_pos.qty) > 0 else "short"
+                }
+                for alpaca_pos in alpaca_positions
+            ]
+            
+            insert = UPSERT_INSERTS.get(db.bind.dialect.name)
+            if insert is None:
+                self._merge_positions(strategy_id, rows, db)
+                db.commit()
+                return
             
+            # Single INSERT ... ON CONFLICT DO UPDATE keyed on (strategy_id, symbol)
+            stmt = insert(Position).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["strategy_id", "symbol"],
+                set_={
+                    "quantity": stmt.excluded.quantity,
+                    "avg_price": stmt.excluded.avg_price,
+                    "current_price": stmt.excluded.current_price,
+                    "market_value": stmt.excluded.market_value,
+                    "unrealized_pnl": stmt.excluded.unrealized_pnl,
+                    "updated_at": func.now()
+                }
+            )
+            try:
+                # Savepoint, so a failed upsert doesn't discard the caller's pending changes
+                with db.begin_nested():
+                    db.execute(stmt)
+            except DBAPIError as e:
+                # Tables created before uq_positions_strategy_symbol existed have no conflict
+                # target until the startup migration adds it; sync them the portable way
+                logger.warning(f"Position upsert failed, falling back to merge: {e}")
+                self._merge_positions(strategy_id, rows, db)
             db.commit()
             
         except Exception as e:
             logger.error(f"Error updating positions: {e}")
             raise
 
-    def update_filled_orders(self, strategy_id: int, db: Session):
-        """Check for filled orders and update trades"""
-        try:
-            # Get pending trades from database
-            pending_trades = db.query(Trade).filter(
-                Trade.strategy_id == strategy_id,
-                Trade.status == "pending"
+    def _merge_positions(self, strategy_id: int, rows: List[dict], db: Session):
+        """Portable upsert for dialects without ON CONFLICT: one IN query, then bulk insert"""
+        existing_positions = {
+            p.symbol: p for p in db.query(Position).options(
+                load_only(Position.id, Position.symbol)
+            ).filter(
+                Position.strategy_id == strategy_id,
+                Position.symbol.in_([row["symbol"] for row in rows])
             ).all()
-            
-            for trade in pending_trades:
-                # Get order status from Alpaca
+        }
+        new_rows = []
+        for row in rows:
+            existing_pos = existing_positions.get(row["symbol"])
+            if existing_pos:
+                for key in ("quantity", "avg_price", "current_price", "market_value",
+                            "unrealized_pnl"):
+                    setattr(existing_pos, key, row[key])
+            else:
+                new_rows.append(row)
+        if new_rows:
+            db.bulk_insert_mappings(Position, new_rows)
+
+    def _get_pending_trades(self, strategy_id: int, db: Session):
+        # Rows are locked until the caller commits; SKIP LOCKED lets concurrent
+        # workers claim disjoint batches (SQLite ignores the locking clause)
+        # Only the columns the fill check reads are loaded
+        return db.query(Trade).options(
+            load_only(Trade.id, Trade.alpaca_order_id, Trade.created_at)
+        ).filter(
+            Trade.strategy_id == strategy_id,
+            Trade.status == "pending"
+        ).with_for_update(skip_locked=True).limit(PENDING_TRADES_BATCH_SIZE).all()
+
+    def _apply_fills(self, pending_trades, orders_by_id: dict, db: Session):
+        """Write fill information for every pending trade whose order has filled"""
+        updates = []
+        for trade in pending_trades:
+            # Get order status from the batch, falling back to a direct lookup
+            alpaca_order = orders_by_id.get(str(trade.alpaca_order_id))
+            if alpaca_order is None:
                 alpaca_order = self.trading_client.get_order_by_id(trade.alpaca_order_id)
-                
-                if alpaca_order.status == OrderStatus.FILLED:
-                    # Update trade with fill information
-                    trade.status = "filled"
-                    trade.price = float(alpaca_order.filled_avg_price)
-                    trade.executed_at = alpaca_order.filled_at
-                    
+            
+            if alpaca_order.status == OrderStatus.FILLED:
+                # Update trade with fill information
+                updates.append({
+                    "trade_id": trade.id,
+                    "fill_price": float(alpaca_order.filled_avg_price),
+                    "filled_at": alpaca_order.filled_at
+                })
+        
+        if updates:
+            # Core executemany UPDATE ... WHERE id = ?, bypassing the ORM unit of work.
+            # Status and commission are the same for every fill, so only the
+            # fill price and time are bound per row
+            trades_table = Trade.__table__
+            stmt = (
+                update(trades_table)
+                .where(trades_table.c.id == bindparam("trade_id"))
+                .values(
+                    status="filled",
+                    price=bindparam("fill_price"),
+                    executed_at=bindparam("filled_at"),
                     # Calculate commission (Alpaca is commission-free, but keeping for future)
-                    trade.commission = 0.0
+                    commission=0.0
+                )
+            )
+            db.connection().execute(stmt, updates)
+        db.commit()
+
+    def update_filled_orders(self, strategy_id: int, db: Session, force: bool = False):
+        """Check for filled orders and update trades (backs off while nothing is pending,
+        unless `force` is set)"""
+        try:
+            if not force and not self._fill_poll_due(strategy_id):
+                return
             
-            db.commit()
+            pending_trades = self._get_pending_trades(strategy_id, db)
+            self._record_fill_poll(strategy_id, bool(pending_trades))
+            
+            if not pending_trades:
+                db.commit()
+                return
+            
+            # Fetch every order since the oldest pending trade in one request
+            orders = self.trading_client.get_orders(GetOrdersRequest(
+                status=QueryOrderStatus.ALL,
+                after=min(t.created_at for t in pending_trades),
+                limit=PENDING_TRADES_BATCH_SIZE
+            ))
+            self._apply_fills(pending_trades, {str(o.id): o for o in orders}, db)
             
         except Exception as e:
             logger.error(f"Error updating filled orders: {e}")
             raise
 
+    async def update_filled_orders_async(self, strategy_id: int, db: Session, force: bool = False):
+        """update_filled_orders with the DB and Alpaca reads off the event loop.
+        
+        The reads run one after the other: the order list is bounded by the
+        oldest pending trade, so only orders that can match are fetched.
+        """
+        try:
+            if not force and not self._fill_poll_due(strategy_id):
+                return
+            
+            pending_trades = await asyncio.to_thread(self._get_pending_trades, strategy_id, db)
+            self._record_fill_poll(strategy_id, bool(pending_trades))
+            
+            if not pending_trades:
+                db.commit()
+                return
+            
+            # Fetch every order since the oldest pending trade in one request
+            orders = await asyncio.to_thread(self.trading_client.get_orders, GetOrdersRequest(
+                status=QueryOrderStatus.ALL,
+                after=min(t.created_at for t in pending_trades),
+                limit=PENDING_TRADES_BATCH_SIZE
+            ))
+            
+            await asyncio.to_thread(
+                self._apply_fills, pending_trades, {str(o.id): o for o in orders}, db
+            )
+            
+        except Exception as e:
+            logger.error(f"Error updating filled orders: {e}")
+            raise
+
+    def _fill_poll_due(self, strategy_id: int) -> bool:
+        next_poll, _ = self._fill_poll_state.get(strategy_id, (0.0, None))
+        return time.monotonic() >= next_poll
+
+    def _record_fill_poll(self, strategy_id: int, found_pending: bool):
+        """Double the poll interval after an empty poll, reset it once trades are pending"""
+        if found_pending:
+            interval = FILL_POLL_MIN_INTERVAL
+        else:
+            _, interval = self._fill_poll_state.get(strategy_id, (0.0, FILL_POLL_MIN_INTERVAL / 2))
+            interval = min(interval * 2, FILL_POLL_MAX_INTERVAL)
+        self._fill_poll_state[strategy_id] = (time.monotonic() + interval, interval)
+
+    def _reset_sync_backoff(self, strategy_id: int = None):
+        """Poll fills and positions again right away after an order is placed.
+        
+        Orders not tied to a strategy reset every strategy, since positions are
+        synced from the shared Alpaca account.
+        """
+        if strategy_id is None:
+            self._fill_poll_state.clear()
+            self._position_synced_at.clear()
+        else:
+            self._fill_poll_state.pop(strategy_id, None)
+            self._position_synced_at.pop(strategy_id, None)
+
     def get_account_info(self):
-        """Get account information from Alpaca"""
+        """Get account information from Alpaca (cached for a short TTL)"""
         try:
+            fetched_at, cached = self._account_cache
+            if cached and time.monotonic() - fetched_at < self._account_ttl:
+                return cached
+            
+            shared = shared_cache.get("account")
+            if shared:
+                self._account_cache = (time.monotonic(), shared)
+                return shared
+            
             account = self.trading_client.get_account()
-            return {
+            account_info = {
                 "buying_power": float(account.buying_power),
                 "cash": float(account.cash),
                 "portfolio_value": float(account.portfolio_value),
                 "day_trade_count": int(account.daytrade_count),
                 "equity": float(account.equity)
             }
+            self._account_cache = (time.monotonic(), account_info)
+            shared_cache.set("account", account_info)
+            return account_info
         except Exception as e:
             logger.error(f"Error getting account info: {e}")
             raise
 
-    def get_latest_quotes(self, symbols: list):
-        """Get latest quotes for multiple symbols"""
+    def _invalidate_account_cache(self):
+        """Force the next get_account_info call to refetch (e.g. after an order)"""
+        self._account_cache = (0.0, None)
+        shared_cache.delete("account")
+
+    def _split_symbols(self, symbols: list):
+        """Separate crypto (normalized to BTC/USD format) and stock symbols"""
+        crypto_symbols = []
+        stock_symbols = []
+        
+        for symbol in symbols:
+            if symbol in CRYPTO_SYMBOLS:
+                crypto_symbols.append(CRYPTO_NORMALIZE.get(symbol, symbol))
+            else:
+                stock_symbols.append(symbol)
+        
+        # Dedupe after normalization, preserving order
+        return list(dict.fromkeys(crypto_symbols)), list(dict.fromkeys(stock_symbols))
+
+    def _get_crypto_quotes(self, crypto_symbols: list) -> dict:
+        """Latest crypto quotes, with fallback data if the request fails"""
+        result = {}
         try:
-            result = {}
+            crypto_request = CryptoLatestQuoteRequest(symbol_or_symbols=crypto_symbols)
+            crypto_quotes = self.crypto_data_client.get_crypto_latest_quote(crypto_request)
             
-            # Separate crypto and stock symbols
-            crypto_symbols = []
-            stock_symbols = []
+            # Keys are already in BTC/USD display format
+            for symbol, quote in crypto_quotes.items():
+                result[symbol] = {
+                    'symbol': symbol,
+                    'price': float(quote.bid_price),
+                    'bid': float(quote.bid_price),
+                    'ask': float(quote.ask_price),
+                    'timestamp': quote.timestamp
+                }
+        except Exception as e:
+            logger.error(f"Error getting crypto quotes: {e}")
+            # Add fallback data for crypto
+            fallback_timestamp = datetime.utcnow()
+            for symbol in crypto_symbols:
+                fallback_price = 75000.0 if 'BTC' in symbol else 2500.0
+                result[symbol] = {
+                    'symbol': symbol,
+                    'price': fallback_price,
+                    'bid': fallback_price,
+                    'ask': fallback_price,
+                    'timestamp': fallback_timestamp
+                }
+        return result
+
+    def _get_stock_quotes(self, stock_symbols: list) -> dict:
+        """Latest stock quotes, with fallback data if the request fails"""
+        result = {}
+        try:
+            stock_request = StockLatestQuoteRequest(symbol_or_symbols=stock_symbols)
+            stock_quotes = self.stock_data_client.get_stock_latest_quote(stock_request)
             
-            for symbol in symbols:
-                if symbol in ['BTC/USD', 'ETH/USD', 'BTCUSD', 'ETHUSD']:
-                    # Keep crypto symbols in BTC/USD format for Alpaca
-                    if '/' not in symbol:
-                        # Convert BTCUSD to BTC/USD
-                        if symbol == 'BTCUSD':
-                            normalized = 'BTC/USD'
-                        elif symbol == 'ETHUSD':
-                            normalized = 'ETH/USD'
-                        else:
-                            normalized = symbol
-                    else:
-                        normalized = symbol
-                    crypto_symbols.append(normalized)
+            for symbol, quote in stock_quotes.items():
+                # Get the best available price
+                bid = float(quote.bid_price) if quote.bid_price else 0
+                ask = float(quote.ask_price) if quote.ask_price else 0
+                
+                # Use mid-price if both available, otherwise use whichever is available
+                if bid > 0 and ask > 0:
+                    price = (bid + ask) / 2
+                elif ask > 0:
+                    price = ask
+                elif bid > 0:
+                    price = bid
                 else:
-                    stock_symbols.append(symbol)
-            
-            # Get crypto quotes
-            if crypto_symbols:
-                try:
-                    crypto_request = CryptoLatestQuoteRequest(symbol_or_symbols=crypto_symbols)
-                    crypto_quotes = self.crypto_data_client.get_crypto_latest_quote(crypto_request)
-                    
-                    for symbol, quote in crypto_quotes.items():
-                        display_symbol = symbol  # Should already be in BTC/USD format
-                            
-                        result[display_symbol] = {
-                            'symbol': display_symbol,
-                            'price': float(quote.bid_price),
-                            'bid': float(quote.bid_price),
-                            'ask': float(quote.ask_price),
-                            'timestamp': quote.timestamp.isoformat()
-                        }
-                except Exception as e:
-                    logger.error(f"Error getting crypto quotes: {e}")
-                    # Add fallback data for crypto
-                    for symbol in crypto_symbols:
-                        display_symbol = 'BTC/USD' if 'BTC' in symbol else symbol
-                        result[display_symbol] = {
-                            'symbol': display_symbol,
-                            'price': 75000.0 if 'BTC' in symbol else 2500.0,
-                            'bid': 75000.0 if 'BTC' in symbol else 2500.0,
-                            'ask': 75000.0 if 'BTC' in symbol else 2500.0,
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-            
-            # Get stock quotes
-            if stock_symbols:
-                try:
-                    stock_request = StockLatestQuoteRequest(symbol_or_symbols=stock_symbols)
-                    stock_quotes = self.stock_data_client.get_stock_latest_quote(stock_request)
-                    
-                    for symbol, quote in stock_quotes.items():
-                        # Get the best available price
-                        bid = float(quote.bid_price) if quote.bid_price else 0
-                        ask = float(quote.ask_price) if quote.ask_price else 0
-                        
-                        # Use mid-price if both available, otherwise use whichever is available
-                        if bid > 0 and ask > 0:
-                            price = (bid + ask) / 2
-                        elif ask > 0:
-                            price = ask
-                        elif bid > 0:
-                            price = bid
+                    # Fallback to latest bar data if quote prices are 0
+                    try:
+                        bars_data = self.get_market_data(symbol, "1Day", 1)
+                        bars = bars_data.get('bars', [])
+                        if bars:
+                            price = bars[-1]['close']  # Use latest close price
                         else:
-                            # Fallback to latest bar data if quote prices are 0
-                            try:
-                                bars_data = self.get_market_data(symbol, "1Day", 1)
-                                bars = bars_data.get('bars', [])
-                                if bars:
-                                    price = bars[-1]['close']  # Use latest close price
-                                else:
-                                    price = 0
-                            except:
-                                price = 0
-                        
-                        result[symbol] = {
-                            'symbol': symbol,
-                            'price': price,
-                            'bid': bid,
-                            'ask': ask,
-                            'timestamp': quote.timestamp.isoformat()
-                        }
-                except Exception as e:
-                    logger.error(f"Error getting stock quotes: {e}")
-                    # Add fallback data for stocks
-                    stock_prices = {'AAPL': 185, 'TSLA': 260, 'SPY': 460, 'MSFT': 350, 'F': 11.00}
-                    for symbol in stock_symbols:
-                        price = stock_prices.get(symbol, 100)
-                        result[symbol] = {
-                            'symbol': symbol,
-                            'price': price,
-                            'bid': price,
-                            'ask': price,
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
+                            price = 0
+                    except:
+                        price = 0
+                
+                result[symbol] = {
+                    'symbol': symbol,
+                    'price': price,
+                    'bid': bid,
+                    'ask': ask,
+                    'timestamp': quote.timestamp
+                }
+        except Exception as e:
+            logger.error(f"Error getting stock quotes: {e}")
+            # Add fallback data for stocks
+            fallback_timestamp = datetime.utcnow()
+            for symbol in stock_symbols:
+                price = STOCK_FALLBACK_PRICES.get(symbol, 100)
+                result[symbol] = {
+                    'symbol': symbol,
+                    'price': price,
+                    'bid': price,
+                    'ask': price,
+                    'timestamp': fallback_timestamp
+                }
+        return result
+
+    def _cached_quotes(self, symbols: list):
+        """Split symbols into fresh cached quotes and symbols that need fetching"""
+        cached = {}
+        missing = []
+        seen = set()
+        now = time.monotonic()
+        for symbol in symbols:
+            key = CRYPTO_NORMALIZE.get(symbol, symbol)
+            # Duplicates (including BTCUSD vs BTC/USD) are only looked up/fetched once
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = self._quote_cache.get(key)
+            if entry and now - entry[0] < self._quote_ttl:
+                cached[key] = entry[1]
+            else:
+                missing.append(symbol)
+        return cached, missing
+
+    def _store_quotes(self, quotes: dict):
+        fetched_at = time.monotonic()
+        for symbol, quote in quotes.items():
+            self._quote_cache[symbol] = (fetched_at, quote)
+
+    def get_latest_quotes(self, symbols: list):
+        """Get latest quotes for multiple symbols (cached for a short TTL)"""
+        result, missing = self._cached_quotes(symbols)
+        if missing:
+            result.update(self._load_quotes(missing))
+        return result
+
+    def _load_quotes(self, symbols: list) -> dict:
+        """Quotes missing from the in-process cache: shared cache first, then Alpaca"""
+        keys = {CRYPTO_NORMALIZE.get(symbol, symbol): symbol for symbol in symbols}
+        shared = shared_cache.get_many([f"quote:{key}" for key in keys])
+        quotes = {key: self._shared_quote(shared[f"quote:{key}"]) for key in keys if f"quote:{key}" in shared}
+        
+        to_fetch = [keys[key] for key in keys if key not in quotes]
+        if to_fetch:
+            # Only one worker refills a given symbol set; others briefly wait for it
+            lock_key = "quotes:" + ",".join(sorted(to_fetch))
+            if not shared_cache.acquire_fetch_lock(lock_key):
+                waited = shared_cache.wait_for([f"quote:{CRYPTO_NORMALIZE.get(s, s)}" for s in to_fetch])
+                for cache_key, quote in waited.items():
+                    quotes[cache_key[len("quote:"):]] = self._shared_quote(quote)
+                to_fetch = [s for s in to_fetch if CRYPTO_NORMALIZE.get(s, s) not in quotes]
+            
+            if to_fetch:
+                fetched = self._fetch_quotes(to_fetch)
+                shared_cache.set_many({f"quote:{symbol}": quote for symbol, quote in fetched.items()})
+                quotes.update(fetched)
+        
+        self._store_quotes(quotes)
+        return quotes
+
+    @staticmethod
+    def _shared_quote(quote: dict) -> dict:
+        """Quote read back from the shared cache, with its timestamp a datetime again
+        (orjson stores datetimes as ISO strings)"""
+        timestamp = quote.get('timestamp')
+        if isinstance(timestamp, str):
+            quote['timestamp'] = datetime.fromisoformat(timestamp)
+        return quote
+
+    def _fetch_quotes(self, symbols: list):
+        """Fetch latest quotes from Alpaca, bypassing the cache"""
+        try:
+            result = {}
+            crypto_symbols, stock_symbols = self._split_symbols(symbols)
+            
+            if crypto_symbols and stock_symbols:
+                # Independent requests - run them concurrently
+                crypto_future = QUOTE_EXECUTOR.submit(self._get_crypto_quotes, crypto_symbols)
+                stock_future = QUOTE_EXECUTOR.submit(self._get_stock_quotes, stock_symbols)
+                result.update(crypto_future.result())
+                result.update(stock_future.result())
+            elif crypto_symbols:
+                result.update(self._get_crypto_quotes(crypto_symbols))
+            elif stock_symbols:
+                result.update(self._get_stock_quotes(stock_symbols))
             
             return result
             
         except Exception as e:
             logger.error(f"Error getting latest quotes: {e}")
             raise
+
+    async def get_latest_quotes_async(self, symbols: list):
+        """Get latest quotes without blocking the event loop.
+        
+        Cache misses are loaded in a worker thread; _fetch_quotes runs the
+        crypto and stock requests concurrently, so wall time is roughly the
+        slower of the two rather than their sum.
+        """
+        try:
+            result, missing = self._cached_quotes(symbols)
+            if missing:
+                result.update(await asyncio.to_thread(self._load_quotes, missing))
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error getting latest quotes: {e}")
+            raise
     
-    def get_market_data(self, symbol: str, timeframe: str = "1Day", limit: int = 100):
-        """Get historical market data"""
+    def get_market_data(self, symbol: str, timeframe: str = "1Day", limit: int = 100,
+                        columnar: bool = False):
+        """Get historical market data.
+        
+        Bars are returned as a list of row dicts, or with columnar=True as one
+        list per field ({"timestamp": [...], "open": [...], ...}), which is a
+        much smaller JSON payload for large limits.
+        """
         try:
-            if symbol in ['BTC/USD', 'ETH/USD', 'BTCUSD', 'ETHUSD']:
+            if symbol in CRYPTO_SYMBOLS:
                 # Crypto historical data
                 normalized_symbol = symbol.replace('/', '')
                 request = CryptoBarsRequest(
@@ -318,20 +765,7 @@ class TradingService:
                     timeframe=TimeFrame.Day,
                     limit=limit
                 )
-                bars = self.crypto_data_client.get_crypto_bars(request)
-                
-                bars_data = []
-                for bar in bars[normalized_symbol]:
-                    bars_data.append({
-                        'timestamp': bar.timestamp.isoformat(),
-                        'open': float(bar.open),
-                        'high': float(bar.high),
-                        'low': float(bar.low),
-                        'close': float(bar.close),
-                        'volume': float(bar.volume)
-                    })
-                
-                return {"symbol": symbol, "bars": bars_data}
+                bars = self.crypto_data_client.get_crypto_bars(request)[normalized_symbol]
             else:
                 # Stock historical data
                 request = StockBarsRequest(
@@ -339,20 +773,58 @@ class TradingService:
                     timeframe=TimeFrame.Day,
                     limit=limit
                 )
-                bars = self.stock_data_client.get_stock_bars(request)
-                
-                bars_data = []
-                for bar in bars[symbol]:
-                    bars_data.append({
-                        'timestamp': bar.timestamp.isoformat(),
-                        'open': float(bar.open),
-                        'high': float(bar.high),
-                        'low': float(bar.low),
-                        'close': float(bar.close),
-                        'volume': float(bar.volume)
-                    })
-                
-                return {"symbol": symbol, "bars": bars_data}
+                bars = self.stock_data_client.get_stock_bars(request)[symbol]
+            
+            # alpaca-py bar fields are already floats; timestamps stay datetimes
+            # and are serialized once at the API boundary
+            if columnar:
+                columns = list(zip(*map(_get_bar_fields, bars))) or [()] * len(BAR_FIELDS)
+                return {"symbol": symbol, "bars": dict(zip(BAR_FIELDS, map(list, columns)))}
+            
+            bars_data = [dict(zip(BAR_FIELDS, values)) for values in map(_get_bar_fields, bars)]
+            
+            return {"symbol": symbol, "bars": bars_data}
+            
+        except Exception as e:
+            logger.error(f"Error getting market data: {e}")
+            raise
+
+    def get_market_data_multi(self, symbols: list, timeframe: str = "1Day", limit: int = 100):
+        """Get historical market data for many symbols in at most two requests.
+        
+        Alpaca applies `limit` to the whole multi-symbol response, so the window
+        is bounded by a start date instead and each symbol is trimmed to its
+        last `limit` bars. Returns {symbol: {"symbol": ..., "bars": [...]}}.
+        """
+        try:
+            # Generous calendar window so stocks still get `limit` trading days
+            start = datetime.utcnow() - timedelta(days=limit * 2)
+            crypto_symbols = list(dict.fromkeys(s.replace('/', '') for s in symbols if s in CRYPTO_SYMBOLS))
+            stock_symbols = list(dict.fromkeys(s for s in symbols if s not in CRYPTO_SYMBOLS))
+            
+            bars_by_symbol = {}
+            if crypto_symbols:
+                bars_by_symbol.update(self.crypto_data_client.get_crypto_bars(CryptoBarsRequest(
+                    symbol_or_symbols=crypto_symbols,
+                    timeframe=TimeFrame.Day,
+                    start=start
+                )).data)
+            if stock_symbols:
+                bars_by_symbol.update(self.stock_data_client.get_stock_bars(StockBarsRequest(
+                    symbol_or_symbols=stock_symbols,
+                    timeframe=TimeFrame.Day,
+                    start=start
+                )).data)
+            
+            result = {}
+            for symbol in symbols:
+                key = symbol.replace('/', '') if symbol in CRYPTO_SYMBOLS else symbol
+                bars = bars_by_symbol.get(key, [])[-limit:]
+                result[symbol] = {
+                    "symbol": symbol,
+                    "bars": [dict(zip(BAR_FIELDS, values)) for values in map(_get_bar_fields, bars)]
+                }
+            return result
             
         except Exception as e:
             logger.error(f"Error getting market data: {e}")
@@ -424,6 +896,8 @@ class TradingService:
             
             # Submit order to Alpaca
             order = self.trading_client.submit_order(order_request)
+            self._invalidate_account_cache()
+            self._reset_sync_backoff()
             
             order_description = f"${notional} of {symbol}" if notional else f"{quantity} shares of {symbol}"
             logger.info(f"Manual {side} order placed: {order_description}")
@@ -431,4 +905,55 @@ class TradingService:
             
         except Exception as e:
             logger.error(f"Error placing manual order: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def place_orders_batch(self, orders: List[MarketOrderRequest], strategy_id: int = None,
+                                 db: Session = None):
+        """Submit independent orders to Alpaca concurrently.
+        
+        When strategy_id and db are given, the whole batch is risk-validated in
+        one call first; blocked orders are not submitted.
+        
+        Returns one result per order, in order: the Alpaca order, or the
+        exception raised while validating or submitting it.
+        """
+        blocked = {}
+        if strategy_id is not None and db is not None:
+            # Price lookups and the DB-backed validation are blocking; keep them off the event loop
+            symbols = list(dict.fromkeys(order.symbol for order in orders))
+            prices = dict(zip(symbols, await asyncio.gather(
+                *(asyncio.to_thread(self.get_current_price, symbol, True) for symbol in symbols)
+            )))
+            validations = await asyncio.to_thread(self._risk_service.validate_trades, [
+                {
+                    "strategy_id": strategy_id,
+                    "symbol": order.symbol,
+                    "side": order.side,
+                    "quantity": int(order.qty or 0),
+                    "price": prices[order.symbol]
+                }
+                for order in orders
+            ], db)
+            for index, (is_valid, alerts) in enumerate(validations):
+                critical_alerts = [a for a in alerts if a.severity == "critical"]
+                if not is_valid and critical_alerts:
+                    error_msg = f"Trade blocked by risk management: {critical_alerts[0].message}"
+                    logger.warning(error_msg)
+                    blocked[index] = ValueError(error_msg)
+        
+        submitted = [order for index, order in enumerate(orders) if index not in blocked]
+        submit_results = iter(await asyncio.gather(
+            *(self._async_submit(order) for order in submitted),
+            return_exceptions=True
+        ))
+        return [
+            blocked[index] if index in blocked else next(submit_results)
+            for index in range(len(orders))
+        ]
+
+    async def _async_submit(self, order_request):
+        """Run the synchronous SDK submit_order call in a worker thread"""
+        order = await asyncio.to_thread(self.trading_client.submit_order, order_request)
+        self._invalidate_account_cache()
+        self._reset_sync_backoff()
+        return order
@@ -5,9 +5,10 @@ Manages typed strategies with full validation and type safety
 
 import asyncio
 import threading
-from typing import Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, FrozenSet, Optional, Tuple
 from sqlmodel import Session, select
-from database.sqlmodel_database import SessionLocal
+from database.sqlmodel_database import SessionLocal, AsyncSessionLocal
 from database.sqlmodel_models import Strategy, StrategyTypeEnum
 from services.trading_service import TradingService
 from services.performance_service import PerformanceService
@@ -15,18 +16,48 @@ from services.strategy_event_logger import strategy_event_logger
 from services.account_sync_service import AccountSyncService
 from strategies.btc_scalping.typed_btc_scalping_strategy import TypedBTCScalpingStrategy
 from strategies.portfolio_distributor.typed_portfolio_distributor_strategy import TypedPortfolioDistributorStrategy
+from strategies.typed_base_strategy import StrategyInstance
 import logging
 import os
+import time
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Strategies sync capital with Alpaca once every this many check intervals
+ACCOUNT_SYNC_FREQUENCY = 60
+
+# Seconds between rewrites of a running strategy's daily performance row
+PERFORMANCE_PERSIST_INTERVAL = int(os.getenv("PERFORMANCE_PERSIST_INTERVAL", 900))
+
+# (symbol, strategy type value) recorded on each tick's trade check event,
+# resolved once per strategy type instead of on every iteration
+TRADE_CHECK_LABELS = {
+    StrategyTypeEnum.BTC_SCALPING: ("BTC/USD", StrategyTypeEnum.BTC_SCALPING.value),
+    StrategyTypeEnum.PORTFOLIO_DISTRIBUTOR: ("PORTFOLIO", StrategyTypeEnum.PORTFOLIO_DISTRIBUTOR.value)
+}
+
 class TypedStrategyRunner:
     """Type-safe strategy runner using SQLModel"""
     
+    __slots__ = (
+        "running_strategies", "strategy_instances", "_state_lock", "_running_ids", "_running_ids_tuple",
+        "_sync_tasks", "_last_daily_update", "trading_service", "performance_service",
+        "account_sync_service", "check_intervals", "_loop", "_executor",
+        "_shutdown_event", "_loop_thread"
+    )
+    
     def __init__(self):
-        self.running_strategies: Dict[int, threading.Thread] = {}
-        self.strategy_instances: Dict[int, object] = {}
+        # Each running strategy is a coroutine on one shared event loop thread
+        self.running_strategies: Dict[int, Future] = {}
+        self.strategy_instances: Dict[int, StrategyInstance] = {}
+        # Writers (start/stop) mutate the dicts under the lock and then publish
+        # an immutable snapshot of running IDs that readers check without locking
+        self._state_lock = threading.RLock()
+        self._running_ids: FrozenSet[int] = frozenset()
+        self._running_ids_tuple: Tuple[int, ...] = ()
+        self._sync_tasks: Dict[int, Future] = {}  # strategy_id -> account sync task
+        self._last_daily_update: Dict[int, tuple] = {}  # strategy_id -> (utc date, monotonic time)
         self.trading_service = TradingService()
         self.performance_service = PerformanceService()
         self.account_sync_service = AccountSyncService()
@@ -36,17 +67,31 @@ class TypedStrategyRunner:
             StrategyTypeEnum.BTC_SCALPING: int(os.getenv("BTC_SCALPING_INTERVAL", 60)),  # 1 minute for scalping
             StrategyTypeEnum.PORTFOLIO_DISTRIBUTOR: int(os.getenv("PORTFOLIO_INTERVAL", 3600))  # 1 hour for portfolio
         }
-        self._shutdown = False
+        self._loop = asyncio.new_event_loop()
+        # Blocking iteration and sync work (asyncio.to_thread) runs on a bounded,
+        # reused pool rather than the loop's default executor
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("STRATEGY_MAX_CONCURRENT", 32)),
+            thread_name_prefix="TypedStrategy"
+        )
+        self._loop.set_default_executor(self._executor)
+        self._shutdown_event = asyncio.Event()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever,
+            daemon=True,
+            name="TypedStrategyLoop"
+        )
+        self._loop_thread.start()
         
         logger.info("✅ Typed Strategy Runner initialized")
         
     def start_strategy(self, strategy_id: int) -> bool:
         """Start a trading strategy with type safety"""
-        if strategy_id in self.running_strategies:
+        if strategy_id in self._running_ids:
             logger.warning(f"Strategy {strategy_id} is already running")
             return False
             
-        with Session(SessionLocal().bind) as db:
+        with SessionLocal() as db:
             try:
                 strategy = db.get(Strategy, strategy_id)
                 if not strategy:
@@ -74,25 +119,31 @@ class TypedStrategyRunner:
                     logger.error(f"Failed to create strategy instance for {strategy_id}")
                     return False
                     
-                # Add to running strategies BEFORE starting thread to avoid race condition
-                self.strategy_instances[strategy_id] = strategy_instance
-                
-                # Start strategy in separate thread
-                thread = threading.Thread(
-                    target=self._run_strategy,
-                    args=(strategy_id, strategy_instance, strategy.strategy_type),
-                    daemon=True,
-                    name=f"TypedStrategy-{strategy_id}"
-                )
-                
-                # Mark as running before starting thread
-                self.running_strategies[strategy_id] = thread
-                thread.start()
+                with self._state_lock:
+                    # Another request may have started it while this one was syncing
+                    if strategy_id in self._running_ids:
+                        logger.warning(f"Strategy {strategy_id} is already running")
+                        strategy_instance.stop()
+                        return False
+                    
+                    # Publish BEFORE scheduling; the loop runs while its ID is published
+                    self.strategy_instances[strategy_id] = strategy_instance
+                    self._publish_running()
+                    
+                    # Schedule the strategy loop and its account sync task on the shared event loop
+                    self.running_strategies[strategy_id] = asyncio.run_coroutine_threadsafe(
+                        self._run_strategy_async(strategy_id, strategy_instance, strategy.strategy_type),
+                        self._loop
+                    )
+                    sync_interval = ACCOUNT_SYNC_FREQUENCY * self.check_intervals.get(strategy.strategy_type, 60)
+                    self._sync_tasks[strategy_id] = asyncio.run_coroutine_threadsafe(
+                        self._sync_loop(strategy_id, sync_interval),
+                        self._loop
+                    )
                 
                 logger.info(f"✅ Started typed strategy {strategy.name} (ID: {strategy_id})")
                 # Log strategy start event
-                with Session(SessionLocal().bind) as event_db:
-                    strategy_event_logger.log_strategy_start(event_db, strategy_id)
+                strategy_event_logger.log_strategy_start(db, strategy_id)
                 return True
                 
             except Exception as e:
@@ -101,26 +152,29 @@ class TypedStrategyRunner:
             
     def stop_strategy(self, strategy_id: int) -> bool:
         """Stop a running strategy"""
-        if strategy_id not in self.running_strategies:
-            logger.warning(f"Strategy {strategy_id} is not running")
-            return False
+        with self._state_lock:
+            if strategy_id not in self._running_ids:
+                logger.warning(f"Strategy {strategy_id} is not running")
+                return False
+            
+            # Unpublish first so the strategy loop exits at its next check
+            future = self.running_strategies.pop(strategy_id)
+            sync_task = self._sync_tasks.pop(strategy_id, None)
+            strategy_instance = self.strategy_instances.pop(strategy_id)
+            self._publish_running()
             
         try:
             # Stop the strategy instance
-            strategy_instance = self.strategy_instances.get(strategy_id)
-            if strategy_instance and hasattr(strategy_instance, 'stop'):
-                strategy_instance.stop()
+            strategy_instance.stop()
                 
-            # Wait for thread to finish (with timeout)
-            thread = self.running_strategies[strategy_id]
-            thread.join(timeout=30)
-            
-            # Clean up
-            del self.running_strategies[strategy_id]
-            del self.strategy_instances[strategy_id]
+            # Cancel the strategy coroutine; an iteration already running in a
+            # worker thread finishes on its own
+            future.cancel()
+            if sync_task:
+                sync_task.cancel()
             
             # Log strategy stop event
-            with Session(SessionLocal().bind) as event_db:
+            with SessionLocal() as event_db:
                 strategy_event_logger.log_strategy_stop(event_db, strategy_id)
             
             logger.info(f"✅ Stopped typed strategy {strategy_id}")
@@ -130,7 +184,7 @@ class TypedStrategyRunner:
             logger.error(f"Error stopping strategy {strategy_id}: {e}")
             return False
             
-    def _create_typed_strategy_instance(self, strategy: Strategy, db: Session):
+    def _create_typed_strategy_instance(self, strategy: Strategy, db: Session) -> Optional[StrategyInstance]:
         """Create typed strategy instance based on type"""
         try:
             if strategy.strategy_type == StrategyTypeEnum.BTC_SCALPING:
@@ -169,114 +223,165 @@ class TypedStrategyRunner:
             logger.error(f"Error creating typed strategy instance: {e}")
             return None
             
-    def _run_strategy(self, strategy_id: int, strategy_instance, strategy_type: StrategyTypeEnum):
-        """Run strategy in a loop with type safety"""
-        check_interval = self.check_intervals.get(strategy_type, 60)
-        logger.info(f"🚀 Typed strategy {strategy_id} thread started (interval: {check_interval}s)")
+    async def _run_strategy_async(self, strategy_id: int, strategy_instance: StrategyInstance,
+                                  strategy_type: StrategyTypeEnum):
+        """Run strategy in a loop with type safety.
         
-        # Track iterations for periodic account sync
-        iteration_count = 0
-        sync_frequency = 60  # Sync every 60 iterations
+        The active check runs on the loop through the async engine; the
+        iteration itself does blocking DB/Alpaca work, so it runs in a worker
+        thread. The waits in between cost nothing on the shared loop.
+        """
+        check_interval = self.check_intervals.get(strategy_type, 60)
+        logger.info(f"🚀 Typed strategy {strategy_id} scheduled (interval: {check_interval}s)")
         
-        while not self._shutdown and strategy_id in self.running_strategies:
-            try:
-                # Create new DB session for each iteration
-                with Session(SessionLocal().bind) as db:
+        try:
+            while not self._shutdown_event.is_set() and strategy_id in self._running_ids:
+                try:
                     # Check if strategy is still active in database
-                    strategy = db.get(Strategy, strategy_id)
+                    async with AsyncSessionLocal() as db:
+                        strategy = await db.get(Strategy, strategy_id)
                     
                     if not strategy or not strategy.is_active:
                         logger.info(f"Strategy {strategy_id} deactivated, stopping...")
                         break
-
-                    # 🔄 PERIODIC ACCOUNT SYNC - Sync capital periodically during execution
-                    iteration_count += 1
-                    if iteration_count % sync_frequency == 0:
-                        logger.info(f"🔄 Periodic account sync for strategy {strategy_id} (iteration {iteration_count})")
-                        sync_success = self.account_sync_service.sync_strategy_capital(strategy_id, db)
-                        if sync_success:
-                            logger.info(f"✅ Strategy {strategy_id} capital synced during execution")
-                            db.refresh(strategy)  # Refresh to get updated capital
-                        else:
-                            logger.warning(f"⚠️ Periodic account sync failed for strategy {strategy_id}")
-                        
-                        # Log account sync event
-                        strategy_event_logger.log_account_sync(db, strategy_id, {
-                            "iteration": iteration_count,
-                            "sync_success": sync_success,
-                            "capital": float(strategy.current_capital) if strategy else 0
-                        })
-                        
-                    # Update strategy instance with fresh DB session
-                    if hasattr(strategy_instance, 'db_session'):
-                        strategy_instance.db_session = db
-                        
-                    # Run strategy iteration
-                    if hasattr(strategy_instance, 'run_iteration'):
-                        logger.debug(f"Running iteration for typed strategy {strategy_id}")
-                        
-                        # Log trade check event
-                        symbol = "BTC/USD" if strategy.strategy_type == StrategyTypeEnum.BTC_SCALPING else "PORTFOLIO"
-                        strategy_event_logger.log_trade_check(db, strategy_id, symbol, details={
-                            "iteration_time": datetime.utcnow().isoformat(),
-                            "check_interval": check_interval,
-                            "strategy_type": strategy.strategy_type.value
-                        })
-                        
-                        strategy_instance.run_iteration()
-                        logger.debug(f"Completed iteration for typed strategy {strategy_id}")
-                        
-                        # Log performance update
-                        try:
-                            metrics = self.performance_service.calculate_strategy_performance(strategy_id, db)
-                            if metrics:
-                                strategy_event_logger.log_performance_update(db, strategy_id, {
-                                    "roi": metrics.get("roi_percentage", 0),
-                                    "pnl": metrics.get("total_pnl", 0),
-                                    "total_trades": metrics.get("total_trades", 0)
-                                })
-                        except Exception as e:
-                            logger.warning(f"Could not log performance update: {e}")
-                        
-                    # Update performance metrics
-                    try:
-                        self.performance_service.update_daily_performance(strategy_id, db)
-                    except Exception as e:
-                        logger.warning(f"Could not update performance metrics: {e}")
                     
-                    # Commit any changes
-                    db.commit()
-                
-                # Wait before next iteration
-                import time
-                time.sleep(check_interval)
+                    await asyncio.to_thread(
+                        self._run_iteration, strategy_id, strategy_instance, strategy_type, check_interval
+                    )
+                except Exception as e:
+                    logger.error(f"Error in typed strategy {strategy_id} loop: {e}")
                 
+                # Wait before next iteration, waking early on shutdown
+                if await self._wait_for_shutdown(check_interval):
+                    break
+        finally:
+            logger.info(f"🛑 Typed strategy {strategy_id} stopped")
+    
+    async def _sync_loop(self, strategy_id: int, interval_seconds: int):
+        """Periodically sync strategy capital with the Alpaca account.
+        
+        Runs as its own task so a slow Alpaca call never delays a trading tick.
+        """
+        sync_count = 0
+        while strategy_id in self._running_ids:
+            if await self._wait_for_shutdown(interval_seconds) or strategy_id not in self._running_ids:
+                break
+            sync_count += 1
+            try:
+                await asyncio.to_thread(self._sync_capital, strategy_id, sync_count)
             except Exception as e:
-                logger.error(f"Error in typed strategy {strategy_id} loop: {e}")
-                import time
-                time.sleep(check_interval)
+                logger.error(f"Error in account sync for strategy {strategy_id}: {e}")
+    
+    def _sync_capital(self, strategy_id: int, sync_count: int):
+        """🔄 PERIODIC ACCOUNT SYNC - Sync capital periodically during execution"""
+        with SessionLocal() as db:
+            logger.info(f"🔄 Periodic account sync for strategy {strategy_id} (sync {sync_count})")
+            sync_success = self.account_sync_service.sync_strategy_capital(strategy_id, db)
+            strategy = db.get(Strategy, strategy_id)
+            if sync_success:
+                logger.info(f"✅ Strategy {strategy_id} capital synced during execution")
+                db.refresh(strategy)  # Refresh to get updated capital
+            else:
+                logger.warning(f"⚠️ Periodic account sync failed for strategy {strategy_id}")
+            
+            # Log account sync event
+            strategy_event_logger.log_account_sync(db, strategy_id, {
+                "sync_count": sync_count,
+                "sync_success": sync_success,
+                "capital": float(strategy.current_capital) if strategy else 0
+            })
+    
+    async def _wait_for_shutdown(self, timeout: float) -> bool:
+        """Sleep for timeout seconds or until shutdown; True if shutting down"""
+        shutdown_wait = asyncio.ensure_future(self._shutdown_event.wait())
+        sleep = asyncio.ensure_future(asyncio.sleep(timeout))
+        try:
+            await asyncio.wait({shutdown_wait, sleep}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            shutdown_wait.cancel()
+            sleep.cancel()
+        return self._shutdown_event.is_set()
+    
+    def _run_iteration(self, strategy_id: int, strategy_instance: StrategyInstance, strategy_type: StrategyTypeEnum,
+                       check_interval: int):
+        """Run one iteration of an active strategy.
+        
+        Performance is computed from the strategy row as loaded in this
+        iteration's session after run_iteration(), not the active check's copy,
+        so capital written by the iteration or _sync_loop in between is included.
+        """
+        # Create new DB session for each iteration; the events and performance
+        # metrics it writes go out in a single commit at the end
+        with SessionLocal() as db, strategy_event_logger.batched(db):
+            # Update strategy instance with fresh DB session
+            strategy_instance.db_session = db
+            
+            # Run strategy iteration
+            logger.debug(f"Running iteration for typed strategy {strategy_id}")
+            
+            # Log trade check event
+            symbol, type_value = TRADE_CHECK_LABELS[strategy_type]
+            strategy_event_logger.log_trade_check(db, strategy_id, symbol, details={
+                "iteration_time": datetime.utcnow().isoformat(),
+                "check_interval": check_interval,
+                "strategy_type": type_value
+            })
+            
+            strategy_instance.run_iteration()
+            logger.debug(f"Completed iteration for typed strategy {strategy_id}")
+            
+            # Compute performance once per tick; today's metric row is only
+            # rewritten on a new day or every PERFORMANCE_PERSIST_INTERVAL seconds
+            try:
+                persist_daily = self._daily_update_due(strategy_id)
+                metrics = self.performance_service.compute_and_persist(
+                    strategy_id, db, persist_daily=persist_daily, commit=False
+                )
+                if persist_daily:
+                    self._last_daily_update[strategy_id] = (datetime.utcnow().date(), time.monotonic())
                 
-        logger.info(f"🛑 Typed strategy {strategy_id} thread stopped")
+                # Log performance update
+                if metrics:
+                    strategy_event_logger.log_performance_update(db, strategy_id, {
+                        "roi": metrics.get("roi_percentage", 0),
+                        "pnl": metrics.get("total_pnl", 0),
+                        "total_trades": metrics.get("total_trades", 0)
+                    })
+            except Exception as e:
+                logger.warning(f"Could not update performance metrics: {e}")
+        
+    def _daily_update_due(self, strategy_id: int) -> bool:
+        last_update = self._last_daily_update.get(strategy_id)
+        if last_update is None:
+            return True
+        last_date, last_time = last_update
+        return (last_date != datetime.utcnow().date()
+                or time.monotonic() - last_time >= PERFORMANCE_PERSIST_INTERVAL)
         
-    def get_running_strategies(self) -> list:
-        """Get list of currently running strategy IDs"""
-        return list(self.running_strategies.keys())
+    def _publish_running(self):
+        """Publish immutable views of the running IDs; call with _state_lock held"""
+        self._running_ids = frozenset(self.strategy_instances)
+        self._running_ids_tuple = tuple(self.strategy_instances)
+        
+    def get_running_strategies(self) -> Tuple[int, ...]:
+        """Get currently running strategy IDs (a shared immutable tuple)"""
+        return self._running_ids_tuple
         
     def is_strategy_running(self, strategy_id: int) -> bool:
         """Check if a strategy is currently running"""
-        return strategy_id in self.running_strategies
+        return strategy_id in self._running_ids
         
     def get_strategy_status(self, strategy_id: int) -> dict:
         """Get detailed status of a strategy"""
         try:
             strategy_instance = self.strategy_instances.get(strategy_id)
-            if strategy_instance and hasattr(strategy_instance, 'get_status'):
+            if strategy_instance:
                 return strategy_instance.get_status()
             else:
                 return {
                     "strategy_id": strategy_id,
                     "is_running": self.is_strategy_running(strategy_id),
-                    "error": "Strategy instance not found or no status method"
+                    "error": "Strategy instance not found"
                 }
         except Exception as e:
             return {
@@ -286,12 +391,16 @@ class TypedStrategyRunner:
         
     def shutdown(self):
         """Shutdown all running strategies"""
-        self._shutdown = True
+        self._loop.call_soon_threadsafe(self._shutdown_event.set)
         logger.info("🛑 Shutting down typed strategy runner...")
         
         # Stop all strategies
-        for strategy_id in list(self.running_strategies.keys()):
+        for strategy_id in self._running_ids:
             self.stop_strategy(strategy_id)
+        
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        strategy_event_logger.flush_buffered()
             
         logger.info("✅ Typed strategy runner shutdown complete")
 
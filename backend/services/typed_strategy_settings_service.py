@@ -3,140 +3,215 @@ Typed Strategy Settings Service using SQLModel
 Provides type-safe CRUD operations for strategy settings
 """
 
-from typing import Dict, Any, Optional, Union, Type
+from typing import Dict, Any, FrozenSet, List, Optional, Union, Type
+from collections import defaultdict
+from functools import lru_cache
+from datetime import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from database.strategy_settings_models import (
     BTCScalpingSettings,
     PortfolioDistributorSettings,
     StrategySettingsFactory,
     StrategyTypeEnum
 )
-from database.models import Strategy
+from database.models import Strategy, StrategySetting
+from services.strategy_settings_service import strategy_settings_service
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Dialect-specific INSERT constructs that support ON CONFLICT DO NOTHING
+CONFLICT_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert
+}
+
+# The set of strategy types is small and fixed, so model lookups, JSON schemas
+# and field names are computed once per type
+@lru_cache(maxsize=8)
+def _get_model(strategy_type: StrategyTypeEnum) -> type:
+    return StrategySettingsFactory.get_settings_model(strategy_type)
+
+@lru_cache(maxsize=8)
+def _get_schema(strategy_type: StrategyTypeEnum) -> Dict[str, Any]:
+    return _get_model(strategy_type).model_json_schema()
+
+@lru_cache(maxsize=8)
+def _get_field_names(strategy_type: StrategyTypeEnum) -> FrozenSet[str]:
+    return frozenset(_get_model(strategy_type).model_fields)
+
 class TypedStrategySettingsService:
     """Type-safe strategy settings service using SQLModel"""
     
-    def __init__(self):
-        pass
+    __slots__ = ()
     
-    def get_settings(
+    async def get_settings(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         strategy_id: int
     ) -> Optional[Union[BTCScalpingSettings, PortfolioDistributorSettings]]:
-        """Get typed settings for a strategy"""
+        """Get typed settings for a strategy (read-only; None if none are stored)"""
         try:
-            # Get strategy to determine type
-            strategy = db.get(Strategy, strategy_id)
-            if not strategy:
-                logger.error(f"Strategy {strategy_id} not found")
+            strategy_type = await self._get_strategy_type(db, strategy_id)
+            if strategy_type is None:
                 return None
+            return await self._select_settings(db, strategy_id, strategy_type)
             
-            strategy_type = StrategyTypeEnum(strategy.strategy_type.value)
-            settings_model = StrategySettingsFactory.get_settings_model(strategy_type)
-            
-            # Query the appropriate settings table
-            statement = select(settings_model).where(settings_model.strategy_id == strategy_id)
-            settings = db.exec(statement).first()
+        except Exception as e:
+            logger.error(f"Error getting settings for strategy {strategy_id}: {e}")
+            return None
+    
+    async def get_or_create_settings(
+        self,
+        db: AsyncSession,
+        strategy_id: int,
+        strategy_type: Optional[StrategyTypeEnum] = None
+    ) -> Optional[Union[BTCScalpingSettings, PortfolioDistributorSettings]]:
+        """Get typed settings for a strategy, creating the defaults if none are stored"""
+        try:
+            if strategy_type is None:
+                strategy_type = await self._get_strategy_type(db, strategy_id)
+                if strategy_type is None:
+                    return None
             
+            settings = await self._select_settings(db, strategy_id, strategy_type)
             if not settings:
                 logger.info(f"No settings found for strategy {strategy_id}, creating defaults")
-                settings = self.create_default_settings(db, strategy_id, strategy_type)
-            
+                settings = await self.create_default_settings(db, strategy_id, strategy_type)
             return settings
             
         except Exception as e:
             logger.error(f"Error getting settings for strategy {strategy_id}: {e}")
             return None
     
-    def create_default_settings(
+    async def _get_strategy_type(self, db: AsyncSession, strategy_id: int) -> Optional[StrategyTypeEnum]:
+        # Get strategy to determine type
+        strategy = await db.get(Strategy, strategy_id)
+        if not strategy:
+            logger.error(f"Strategy {strategy_id} not found")
+            return None
+        return StrategyTypeEnum(strategy.strategy_type.value)
+    
+    async def _select_settings(
+        self,
+        db: AsyncSession,
+        strategy_id: int,
+        strategy_type: StrategyTypeEnum
+    ) -> Optional[Union[BTCScalpingSettings, PortfolioDistributorSettings]]:
+        # Query the appropriate settings table
+        settings_model = _get_model(strategy_type)
+        statement = select(settings_model).where(settings_model.strategy_id == strategy_id)
+        return (await db.exec(statement)).first()
+    
+    async def create_default_settings(
         self,
-        db: Session,
+        db: AsyncSession,
         strategy_id: int,
         strategy_type: StrategyTypeEnum
     ) -> Optional[Union[BTCScalpingSettings, PortfolioDistributorSettings]]:
-        """Create default settings for a strategy"""
+        """Create default settings for a strategy.
+        
+        On PostgreSQL/SQLite this is INSERT ... ON CONFLICT DO NOTHING, so
+        concurrent callers cannot both create the row; whichever row exists
+        afterwards is returned.
+        """
         try:
             settings = StrategySettingsFactory.create_default_settings(strategy_type, strategy_id)
             
-            db.add(settings)
-            db.commit()
-            db.refresh(settings)
+            insert = CONFLICT_INSERTS.get(db.bind.dialect.name)
+            if insert is None:
+                db.add(settings)
+                await db.commit()
+                await db.refresh(settings)
+            else:
+                statement = insert(_get_model(strategy_type)).values(
+                    **settings.model_dump()
+                ).on_conflict_do_nothing(index_elements=["strategy_id"])
+                await db.execute(statement)
+                await db.commit()
+                settings = await self._select_settings(db, strategy_id, strategy_type)
             
             logger.info(f"Created default {strategy_type.value} settings for strategy {strategy_id}")
             return settings
             
         except Exception as e:
             logger.error(f"Error creating default settings for strategy {strategy_id}: {e}")
-            db.rollback()
+            await db.rollback()
             return None
     
-    def update_settings(
+    async def update_settings(
         self,
-        db: Session,
+        db: AsyncSession,
         strategy_id: int,
         updates: Dict[str, Any]
     ) -> Optional[Union[BTCScalpingSettings, PortfolioDistributorSettings]]:
         """Update settings for a strategy with validation"""
         try:
             # Get current settings
-            current_settings = self.get_settings(db, strategy_id)
+            current_settings = await self.get_or_create_settings(db, strategy_id)
             if not current_settings:
                 logger.error(f"Cannot update settings for strategy {strategy_id}: not found")
                 return None
             
-            # Apply updates
+            # Apply updates, skipping values that are already current
+            changed = []
             for key, value in updates.items():
                 if hasattr(current_settings, key):
-                    setattr(current_settings, key, value)
+                    if getattr(current_settings, key) != value:
+                        setattr(current_settings, key, value)
+                        changed.append(key)
                 else:
                     logger.warning(f"Unknown setting key '{key}' for strategy {strategy_id}")
             
+            if not changed:
+                logger.debug(f"Settings for strategy {strategy_id} unchanged, nothing to save")
+                return current_settings
+            
             # Update timestamp
-            from datetime import datetime
             current_settings.updated_at = datetime.utcnow()
             
-            # Validate and save
+            # Validate and save; the refresh reloads the attributes the commit
+            # expired, which async sessions cannot lazy-load
             db.add(current_settings)
-            db.commit()
-            db.refresh(current_settings)
+            await db.commit()
+            await db.refresh(current_settings)
             
-            logger.info(f"Updated settings for strategy {strategy_id}: {list(updates.keys())}")
+            logger.info(f"Updated settings for strategy {strategy_id}: {changed}")
             return current_settings
             
         except Exception as e:
             logger.error(f"Error updating settings for strategy {strategy_id}: {e}")
-            db.rollback()
+            await db.rollback()
             return None
     
-    def delete_settings(self, db: Session, strategy_id: int) -> bool:
+    async def delete_settings(self, db: AsyncSession, strategy_id: int) -> bool:
         """Delete settings for a strategy"""
         try:
-            settings = self.get_settings(db, strategy_id)
+            settings = await self.get_settings(db, strategy_id)
             if not settings:
                 logger.warning(f"No settings to delete for strategy {strategy_id}")
                 return True
             
-            db.delete(settings)
-            db.commit()
+            await db.delete(settings)
+            await db.commit()
             
             logger.info(f"Deleted settings for strategy {strategy_id}")
             return True
             
         except Exception as e:
             logger.error(f"Error deleting settings for strategy {strategy_id}: {e}")
-            db.rollback()
+            await db.rollback()
             return False
     
     def get_settings_schema(self, strategy_type: StrategyTypeEnum) -> Dict[str, Any]:
         """Get the JSON schema for a strategy type's settings"""
         try:
-            settings_model = StrategySettingsFactory.get_settings_model(strategy_type)
-            return settings_model.model_json_schema()
+            return _get_schema(strategy_type)
         except Exception as e:
             logger.error(f"Error getting schema for {strategy_type}: {e}")
             return {}
@@ -157,68 +232,76 @@ class TypedStrategySettingsService:
     
     def migrate_legacy_settings(self, db: Session, strategy_id: int) -> bool:
         """Migrate settings from old StrategySetting table to new typed models"""
+        return self.migrate_legacy_settings_bulk(db, [strategy_id])[strategy_id]
+    
+    def migrate_legacy_settings_bulk(self, db: Session, strategy_ids: List[int]) -> Dict[int, bool]:
+        """Migrate legacy settings for many strategies with one query per table and one commit"""
         try:
-            from database.models import StrategySetting, Strategy
-            
-            # Get strategy type
-            strategy = db.get(Strategy, strategy_id)
-            if not strategy:
-                logger.error(f"Strategy {strategy_id} not found for migration")
-                return False
+            strategies = {
+                s.id: s for s in db.execute(select(Strategy).where(Strategy.id.in_(strategy_ids))).scalars()
+            }
             
-            strategy_type = StrategyTypeEnum(strategy.strategy_type.value)
-            
-            # Get old settings
-            old_settings = db.query(StrategySetting).filter(
-                StrategySetting.strategy_id == strategy_id
-            ).all()
+            # Get old settings for every strategy, grouped into per-strategy dicts
+            # as the rows are iterated
+            legacy_settings = defaultdict(dict)
+            for setting in db.execute(
+                select(StrategySetting).where(StrategySetting.strategy_id.in_(strategy_ids))
+            ).scalars():
+                legacy_settings[setting.strategy_id][setting.setting_key] = (
+                    strategy_settings_service._parse_setting_value(setting.setting_value, setting.setting_type)
+                )
             
-            if not old_settings:
-                logger.info(f"No legacy settings to migrate for strategy {strategy_id}")
-                return True
+            results = {}
+            new_settings = []
+            for strategy_id in strategy_ids:
+                strategy = strategies.get(strategy_id)
+                if not strategy:
+                    logger.error(f"Strategy {strategy_id} not found for migration")
+                    results[strategy_id] = False
+                elif strategy_id not in legacy_settings:
+                    logger.info(f"No legacy settings to migrate for strategy {strategy_id}")
+                    results[strategy_id] = True
+                else:
+                    strategy_type = StrategyTypeEnum(strategy.strategy_type.value)
+                    new_settings.append(
+                        self._build_migrated_settings(strategy_id, strategy_type, legacy_settings[strategy_id])
+                    )
+                    results[strategy_id] = True
             
-            # Convert to dictionary
-            settings_dict = {}
-            for setting in old_settings:
-                from services.strategy_settings_service import strategy_settings_service
-                value = strategy_settings_service._parse_setting_value(
-                    setting.setting_value, setting.setting_type
-                )
-                settings_dict[setting.setting_key] = value
-            
-            # Create new typed settings
-            settings_model = StrategySettingsFactory.get_settings_model(strategy_type)
-            
-            # Filter out settings that don't exist in the new model
-            model_fields = settings_model.model_fields.keys()
-            filtered_settings = {k: v for k, v in settings_dict.items() if k in model_fields}
-            filtered_settings['strategy_id'] = strategy_id
-            
-            # Special handling for portfolio settings
-            if strategy_type == StrategyTypeEnum.PORTFOLIO_DISTRIBUTOR:
-                # Convert list/dict to JSON strings for storage
-                if 'symbols' in filtered_settings and isinstance(filtered_settings['symbols'], list):
-                    import json
-                    filtered_settings['symbols'] = json.dumps(filtered_settings['symbols'])
-                if 'weights' in filtered_settings and isinstance(filtered_settings['weights'], dict):
-                    import json  
-                    filtered_settings['allocation_weights'] = json.dumps(filtered_settings['weights'])
-                    del filtered_settings['weights']  # Remove old key
-            
-            # Create new settings instance
-            new_settings = settings_model(**filtered_settings)
-            
-            # Save to database
-            db.add(new_settings)
-            db.commit()
-            
-            logger.info(f"Migrated settings for strategy {strategy_id} from legacy format")
-            return True
+            if new_settings:
+                # Save to database
+                db.add_all(new_settings)
+                db.commit()
+                logger.info(f"Migrated settings for {len(new_settings)} strategies from legacy format")
+            return results
             
         except Exception as e:
-            logger.error(f"Error migrating legacy settings for strategy {strategy_id}: {e}")
+            logger.error(f"Error migrating legacy settings for strategies {strategy_ids}: {e}")
             db.rollback()
-            return False
+            return {strategy_id: False for strategy_id in strategy_ids}
+    
+    def _build_migrated_settings(
+        self,
+        strategy_id: int,
+        strategy_type: StrategyTypeEnum,
+        settings_dict: Dict[str, Any]
+    ) -> Union[BTCScalpingSettings, PortfolioDistributorSettings]:
+        """Create the typed settings instance for one strategy's legacy settings"""
+        # Filter out settings that don't exist in the new model
+        model_fields = _get_field_names(strategy_type)
+        filtered_settings = {k: v for k, v in settings_dict.items() if k in model_fields}
+        filtered_settings['strategy_id'] = strategy_id
+        
+        # Special handling for portfolio settings
+        if strategy_type == StrategyTypeEnum.PORTFOLIO_DISTRIBUTOR:
+            # Convert list/dict to JSON strings for storage
+            if 'symbols' in filtered_settings and isinstance(filtered_settings['symbols'], list):
+                filtered_settings['symbols'] = json.dumps(filtered_settings['symbols'])
+            if 'weights' in filtered_settings and isinstance(filtered_settings['weights'], dict):
+                filtered_settings['allocation_weights'] = json.dumps(filtered_settings['weights'])
+                del filtered_settings['weights']  # Remove old key
+        
+        return _get_model(strategy_type)(**filtered_settings)
 
 # Global instance
 typed_settings_service = TypedStrategySettingsService()
\ No newline at end of file
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from sqlalchemy.orm import Session
-from dataclasses import dataclass
+from dataclasses import dataclass, make_dataclass
 from datetime import datetime
+from functools import lru_cache
+import keyword
 import pandas as pd
 from services.strategy_settings_service import strategy_settings_service, SettingType
 import logging
@@ -43,14 +45,39 @@ class BacktestResult:
     equity_curve: List[Dict]  # [{date: datetime, value: float}, ...]
     metadata: Dict[str, Any]  # Strategy-specific additional data
 
+# Cached marker for keys that have no stored setting
+_MISSING = object()
+
+@lru_cache(maxsize=None)
+def _settings_snapshot_class(keys: Tuple[str, ...]) -> type:
+    """Frozen, slotted dataclass with one attribute per setting key"""
+    return make_dataclass("StrategySettings", keys, frozen=True, slots=True)
+
+def build_settings_snapshot(settings: Dict[str, Any]) -> Any:
+    """Slotted snapshot of parsed settings for attribute access in hot loops
+    
+    Keys that are not valid identifiers stay reachable through get_setting only.
+    """
+    values = {
+        key: value for key, value in settings.items()
+        if key.isidentifier() and not keyword.iskeyword(key)
+    }
+    keys = tuple(sorted(values))
+    return _settings_snapshot_class(keys)(**values)
+
 class BaseStrategy(ABC):
     """Base class for all trading strategies with settings management"""
     
     def __init__(self, strategy_id: int, db_session: Session):
         self.strategy_id = strategy_id
         self.db_session = db_session
+        # Settings fetched so far; individual keys load on first read,
+        # _cache_loaded means every stored setting is present
         self._settings_cache = {}
         self._cache_loaded = False
+        # Coerced int/float/bool values keyed by (key, type, default), cleared with the cache
+        self._coerced_cache: Dict[tuple, Any] = {}
+        self._settings_snapshot = None
     
     def _load_settings_cache(self) -> None:
         """Load all settings into cache for performance"""
@@ -58,13 +85,24 @@ class BaseStrategy(ABC):
             self._settings_cache = strategy_settings_service.get_all_settings(
                 self.db_session, self.strategy_id
             )
+            self._coerced_cache.clear()
+            self._settings_snapshot = build_settings_snapshot(self._settings_cache)
             self._cache_loaded = True
             logger.debug(f"Loaded settings cache for strategy {self.strategy_id}")
     
+    @property
+    def settings(self) -> Any:
+        """Slotted snapshot of all settings (loads every setting on first use)"""
+        self._load_settings_cache()
+        return self._settings_snapshot
+    
     def get_setting(self, key: str, default: Any = None) -> Any:
         """Get a setting value with optional default"""
-        self._load_settings_cache()
-        return self._settings_cache.get(key, default)
+        value = self._settings_cache.get(key, _MISSING)
+        if value is _MISSING and not self._cache_loaded and key not in self._settings_cache:
+            value = strategy_settings_service.get_setting(self.db_session, self.strategy_id, key)
+            self._settings_cache[key] = _MISSING if value is None else value
+        return default if value is _MISSING or value is None else value
     
     def set_setting(self, key: str, value: Any, setting_type: SettingType, 
                    description: str = "", is_required: bool = False) -> bool:
@@ -82,39 +120,58 @@ class BaseStrategy(ABC):
         if success:
             # Update cache
             self._settings_cache[key] = value
+            self._coerced_cache.clear()
+            if self._cache_loaded:
+                self._settings_snapshot = build_settings_snapshot(self._settings_cache)
             
         return success
     
     def get_int_setting(self, key: str, default: int = 0) -> int:
         """Get an integer setting"""
+        cache_key = (key, int, default)
+        if cache_key in self._coerced_cache:
+            return self._coerced_cache[cache_key]
         value = self.get_setting(key, default)
         try:
-            return int(value)
+            result = int(value)
         except (ValueError, TypeError):
             logger.warning(f"Invalid integer setting {key}={value}, using default {default}")
-            return default
+            result = default
+        self._coerced_cache[cache_key] = result
+        return result
     
     def get_float_setting(self, key: str, default: float = 0.0) -> float:
         """Get a float setting"""
+        cache_key = (key, float, default)
+        if cache_key in self._coerced_cache:
+            return self._coerced_cache[cache_key]
         value = self.get_setting(key, default)
         try:
-            return float(value)
+            result = float(value)
         except (ValueError, TypeError):
             logger.warning(f"Invalid float setting {key}={value}, using default {default}")
-            return default
+            result = default
+        self._coerced_cache[cache_key] = result
+        return result
     
     def get_bool_setting(self, key: str, default: bool = False) -> bool:
         """Get a boolean setting"""
+        cache_key = (key, bool, default)
+        if cache_key in self._coerced_cache:
+            return self._coerced_cache[cache_key]
         value = self.get_setting(key, default)
         if isinstance(value, bool):
-            return value
-        if isinstance(value, str):
-            return value.lower() in ('true', '1', 'yes', 'on')
-        try:
-            return bool(int(value))
-        except (ValueError, TypeError):
-            logger.warning(f"Invalid boolean setting {key}={value}, using default {default}")
-            return default
+            result = value
+        elif isinstance(value, str):
+            result = value.lower() in ('true', '1', 'yes', 'on')
+        else:
+            try:
+                result = bool(int(value))
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid boolean setting {key}={value}, using default {default}")
+                result = default
+        self._coerced_cache[cache_key] = result
+        return result
     
     def get_list_setting(self, key: str, default: list = None) -> list:
         """Get a list setting (JSON array)"""
@@ -143,9 +200,11 @@ class BaseStrategy(ABC):
         )
     
     def refresh_settings(self) -> None:
-        """Refresh settings cache from database"""
+        """Drop cached settings so the next reads come from the database"""
+        self._settings_cache = {}
         self._cache_loaded = False
-        self._load_settings_cache()
+        self._coerced_cache.clear()
+        self._settings_snapshot = None
     
     def get_all_settings(self) -> Dict[str, Any]:
         """Get all settings as a dictionary"""
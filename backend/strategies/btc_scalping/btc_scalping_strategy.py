@@ -2,11 +2,13 @@ import asyncio
 import json
 import time
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
 from services.trading_service import TradingService
 from services.performance_service import PerformanceService
 from services.ai_analysis_service import AIAnalysisService
+from services.technical_indicators import ma_crossover
 from strategies.base_strategy import BaseStrategy
 from services.strategy_settings_service import SettingType
 from alpaca.trading.enums import OrderSide
@@ -96,9 +98,9 @@ class BTCScalpingStrategy(BaseStrategy):
                 logger.info(f"[{datetime.now().strftime('%H:%M:%S')}] ASSESSMENT: Insufficient data for analysis (got {len(bars_data) if bars_data is not None else 0} bars, need {lookback_periods})")
                 return
                 
-            # Get current price for logging
-            current_price = bars_data.iloc[-1]['close']
-            current_volume = bars_data.iloc[-1]['volume']
+            # Latest bar values, read once from the column arrays (no per-row Series)
+            current_price = float(bars_data['close'].to_numpy()[-1])
+            current_volume = float(bars_data['volume'].to_numpy()[-1])
             
             # Analyze market and generate signals
             signal = self._analyze_market(bars_data)
@@ -107,13 +109,13 @@ class BTCScalpingStrategy(BaseStrategy):
             assessment_time = datetime.now().strftime('%H:%M:%S')
             if signal:
                 logger.info(f"[{assessment_time}] SIGNAL: {signal} - Price: ${current_price:.2f}, Volume: {current_volume:.0f}")
-                self._execute_signal(signal, bars_data.iloc[-1])
+                self._execute_signal(signal, current_price)
             else:
                 logger.info(f"[{assessment_time}] NO ACTION - Price: ${current_price:.2f}, Volume: {current_volume:.0f} - Conditions not met")
                 
             # Check existing positions
             if self.current_position:
-                self._manage_position(bars_data.iloc[-1])
+                self._manage_position(current_price)
                 
         except Exception as e:
             logger.error(f"Error in strategy iteration: {e}")
@@ -165,7 +167,6 @@ class BTCScalpingStrategy(BaseStrategy):
                 return None
             
             # Convert to DataFrame - handle different BarSet structures
-            bar_list = []
             data_source = None
             
             if hasattr(bars, 'data') and self.symbol in bars.data:
@@ -179,21 +180,29 @@ class BTCScalpingStrategy(BaseStrategy):
                 logger.warning(f"No data found for {self.symbol} in bars object")
                 return None
                 
-            for bar in data_source:
-                bar_list.append({
-                    'timestamp': bar.timestamp,
-                    'open': float(bar.open),
-                    'high': float(bar.high),
-                    'low': float(bar.low),
-                    'close': float(bar.close),
-                    'volume': float(bar.volume)
-                })
-                
-            df = pd.DataFrame(bar_list)
-            if len(df) > 0:
-                df = df.sort_values('timestamp').reset_index(drop=True)
-                
-            return df
+            # Fill typed column arrays instead of a dict per bar
+            n = len(data_source)
+            timestamps = np.fromiter((bar.timestamp for bar in data_source), dtype=object, count=n)
+            ohlcv = np.fromiter(
+                ((bar.open, bar.high, bar.low, bar.close, bar.volume) for bar in data_source),
+                dtype=np.dtype((np.float64, 5)), count=n
+            )
+            
+            # Alpaca returns bars in time order; only reorder if that ever changes
+            if n > 1 and not (timestamps[1:] >= timestamps[:-1]).all():
+                order = np.argsort(timestamps, kind='stable')
+                timestamps = timestamps[order]
+                ohlcv = ohlcv[order]
+            
+            opens, highs, lows, closes, volumes = ohlcv.T.copy()
+            return pd.DataFrame({
+                'timestamp': pd.to_datetime(timestamps, utc=True),
+                'open': opens,
+                'high': highs,
+                'low': lows,
+                'close': closes,
+                'volume': volumes
+            }, copy=False)
             
         except Exception as e:
             logger.error(f"Error getting market data: {e}")
@@ -206,17 +215,9 @@ class BTCScalpingStrategy(BaseStrategy):
             if len(bars_data) < long_ma_periods:
                 return None
             
-            # Convert DataFrame to list format for AI service
-            price_data = []
-            for _, row in bars_data.iterrows():
-                price_data.append({
-                    'timestamp': row['timestamp'],
-                    'open': row['open'],
-                    'high': row['high'],
-                    'low': row['low'],
-                    'close': row['close'],
-                    'volume': row['volume']
-                })
+            # Convert DataFrame to list format for AI service; to_dict avoids
+            # building a Series per row the way iterrows() does
+            price_data = bars_data.to_dict('records')
             
             # Calculate technical indicators
             technical_indicators = self.ai_analysis_service.calculate_technical_indicators(price_data)
@@ -263,19 +264,16 @@ class BTCScalpingStrategy(BaseStrategy):
             # Calculate moving averages using settings
             short_ma_periods = self.get_int_setting("short_ma_periods", 3)
             long_ma_periods = self.get_int_setting("long_ma_periods", 5)
-            bars_data['short_ma'] = bars_data['close'].rolling(
-                window=short_ma_periods
-            ).mean()
-            bars_data['long_ma'] = bars_data['close'].rolling(
-                window=long_ma_periods
-            ).mean()
-            
-            # Get latest values
-            latest = bars_data.iloc[-1]
-            previous = bars_data.iloc[-2] if len(bars_data) > 1 else latest
+            # Only the latest MA values are needed, so average the tail slices
+            # instead of materializing full rolling columns every iteration
+            close_arr = bars_data['close'].to_numpy(np.float64)
+            current_short_ma, current_long_ma, buy_signal = ma_crossover(
+                close_arr, short_ma_periods, long_ma_periods
+            )
+            current_price = close_arr[-1]
             
             # Check volume (with paper trading accommodation)
-            actual_volume = latest['volume']
+            actual_volume = bars_data['volume'].to_numpy()[-1]
             effective_volume = actual_volume
             
             # Handle paper trading zero volume using settings
@@ -302,11 +300,6 @@ class BTCScalpingStrategy(BaseStrategy):
                 logger.info(f"  ❌ Cooldown active: {time_since_last}s since last signal (need 300s)")
                 return None
             
-            # Moving average crossover strategy
-            current_short_ma = latest['short_ma']
-            current_long_ma = latest['long_ma']
-            current_price = latest['close']
-            
             # Check for valid MA values
             if pd.isna(current_short_ma) or pd.isna(current_long_ma):
                 logger.info(f"  ❌ Invalid MA values: Short MA={current_short_ma}, Long MA={current_long_ma}")
@@ -329,7 +322,7 @@ class BTCScalpingStrategy(BaseStrategy):
                 logger.info(f"     Volume OK: ✅ ({effective_volume:.0f} > {min_volume})")
             
             # Buy signal: short MA crosses above long MA
-            if short_above_long and price_above_short:
+            if buy_signal:
                 logger.info(f"  ✅ BUY conditions met!")
                 return "BUY"
             else:
@@ -379,7 +372,7 @@ class BTCScalpingStrategy(BaseStrategy):
             logger.error(f"Error combining signals: {e}")
             return traditional_signal
             
-    def _execute_signal(self, signal: str, current_bar):
+    def _execute_signal(self, signal: str, current_price: float):
         """Execute trading signal"""
         try:
             # Check if we already have a position
@@ -394,7 +387,7 @@ class BTCScalpingStrategy(BaseStrategy):
                 return
                 
             if signal == "BUY":
-                self._enter_position("buy", current_bar['close'])
+                self._enter_position("buy", current_price)
                 
         except Exception as e:
             logger.error(f"Error executing signal: {e}")
@@ -445,13 +438,12 @@ class BTCScalpingStrategy(BaseStrategy):
         except Exception as e:
             logger.error(f"Error entering position: {e}")
             
-    def _manage_position(self, current_bar):
+    def _manage_position(self, current_price: float):
         """Manage existing position for exits"""
         if not self.current_position:
             return
             
         try:
-            current_price = current_bar['close']
             entry_price = self.current_position['entry_price']
             side = self.current_position['side']
             
@@ -6,24 +6,199 @@ Full type safety with automatic validation and IDE support
 import asyncio
 import json
 import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from sqlmodel import Session
 from services.trading_service import TradingService
 from services.performance_service import PerformanceService
-from services.ai_analysis_service import AIAnalysisService
+from services.technical_indicators import ma_crossover, njit, rolling_mean, volume_ok
+from services.bars_cache import bars_cache
 from strategies.typed_base_strategy import TypedBaseStrategy
 from database.sqlmodel_models import BTCScalpingSettings, Position
 from alpaca.trading.enums import OrderSide
-from alpaca.data.requests import CryptoBarsRequest
-from alpaca.data.timeframe import TimeFrame
-from alpaca.data.historical import CryptoHistoricalDataClient
 import logging
 import os
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 
 logger = logging.getLogger(__name__)
 
+# Symbol formats probed until Alpaca returns bars for one of them
+SYMBOL_FORMATS = ("BTC/USD", "BTCUSD", "BTC-USD")
+
+# Resolved symbol per strategy, kept across restarts so the probe runs once
+RESOLVED_SYMBOLS_FILE = os.getenv("RESOLVED_SYMBOLS_FILE", "resolved_symbols.json")
+
+# Seconds to stop asking Alpaca for bars after every symbol format failed
+SYMBOL_RETRY_DELAY = 300.0
+
+# Minimum seconds between entry signals
+SIGNAL_COOLDOWN = 300.0
+
+# Signal taken when traditional and AI analysis agree; any other pair holds
+AGREED_SIGNALS = {("BUY", "BUY"): "BUY", ("SELL", "SELL"): "SELL"}
+
+# AI confidence above which the AI signal wins when signals are not combined
+AI_STANDALONE_CONFIDENCE = 0.7
+
+def _load_resolved_symbols() -> Dict[str, str]:
+    try:
+        with open(RESOLVED_SYMBOLS_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Could not read {RESOLVED_SYMBOLS_FILE}: {e}")
+        return {}
+
+def _save_resolved_symbol(strategy_id: int, symbol: str) -> None:
+    try:
+        resolved = _load_resolved_symbols()
+        resolved[str(strategy_id)] = symbol
+        with open(RESOLVED_SYMBOLS_FILE, "w") as f:
+            json.dump(resolved, f)
+    except Exception as e:
+        logger.warning(f"Could not persist resolved symbol for strategy {strategy_id}: {e}")
+
+# One open/high/low/close/volume row per bar, filled straight from the Alpaca bars
+OHLCV_ROW = np.dtype((np.float64, 5))
+
+# Backtest trade record layout produced by _run_backtest
+BT_BAR, BT_SIDE, BT_QTY, BT_PRICE, BT_PNL, BT_REASON = range(6)
+BT_SIDES = {1: "buy", -1: "sell"}
+BT_REASONS = {0: "Entry signal", 1: "Stop loss", 2: "Take profit", 3: "Backtest end"}
+
+@njit(cache=True)
+def _run_backtest(close, short_ma, long_ma, rsi, start, position_size_pct,
+                  initial_capital, rsi_overbought, rsi_oversold):
+    """Bar-by-bar MA crossover simulation
+    
+    Position state is sequential, so this is a single compiled pass rather
+    than a parallel loop. Returns (portfolio values, cash values, trades,
+    trade count, final capital); trades rows follow the BT_* column layout
+    with pnl NaN for entries.
+    """
+    n = close.shape[0]
+    steps = max(n - start, 0)
+    portfolio = np.empty(steps)
+    cash = np.empty(steps)
+    trades = np.empty((2 * steps + 1, 6))
+    trade_count = 0
+    
+    capital = initial_capital
+    side = 0  # 0 flat, 1 long, -1 short
+    entry_price = 0.0
+    quantity = 0.0
+    
+    for i in range(start, n):
+        price = close[i]
+        
+        # Record portfolio value
+        portfolio[i - start] = capital + quantity * price if side != 0 else capital
+        cash[i - start] = capital
+        
+        # Check for exit signals first
+        if side != 0:
+            reason = 0
+            if side == 1 and price < entry_price * 0.98:
+                reason = 1
+            elif side == -1 and price > entry_price * 1.02:
+                reason = 1
+            elif side == 1 and price > entry_price * 1.01:
+                reason = 2
+            elif side == -1 and price < entry_price * 0.99:
+                reason = 2
+            
+            if reason != 0:
+                pnl = (price - entry_price) * quantity if side == 1 else (entry_price - price) * quantity
+                capital += pnl
+                trades[trade_count, 0] = i
+                trades[trade_count, 1] = -side
+                trades[trade_count, 2] = quantity
+                trades[trade_count, 3] = price
+                trades[trade_count, 4] = pnl
+                trades[trade_count, 5] = reason
+                trade_count += 1
+                side = 0
+        
+        # Check for entry signals (simple MA crossover filtered by RSI)
+        if side == 0 and i >= 1:
+            signal = 0
+            if (short_ma[i] > long_ma[i] and short_ma[i - 1] <= long_ma[i - 1]
+                    and rsi[i] < rsi_overbought):
+                signal = 1
+            elif (short_ma[i] < long_ma[i] and short_ma[i - 1] >= long_ma[i - 1]
+                    and rsi[i] > rsi_oversold):
+                signal = -1
+            
+            if signal != 0:
+                side = signal
+                entry_price = price
+                quantity = capital * position_size_pct / price
+                trades[trade_count, 0] = i
+                trades[trade_count, 1] = signal
+                trades[trade_count, 2] = quantity
+                trades[trade_count, 3] = price
+                trades[trade_count, 4] = np.nan
+                trades[trade_count, 5] = 0
+                trade_count += 1
+    
+    # Close any remaining position
+    final_capital = capital
+    if side != 0:
+        price = close[n - 1]
+        pnl = (price - entry_price) * quantity if side == 1 else (entry_price - price) * quantity
+        final_capital += pnl
+        trades[trade_count, 0] = n - 1
+        trades[trade_count, 1] = -side
+        trades[trade_count, 2] = quantity
+        trades[trade_count, 3] = price
+        trades[trade_count, 4] = pnl
+        trades[trade_count, 5] = 3
+        trade_count += 1
+    
+    return portfolio, cash, trades, trade_count, final_capital
+
+@dataclass(slots=True)
+class OpenPosition:
+    """Position the live strategy is currently holding"""
+    trade_id: int
+    side: str
+    entry_price: float
+    quantity: float
+    timestamp: datetime
+    take_profit_price: float
+    stop_loss_price: float
+
+@dataclass
+class Bars:
+    """OHLCV window as parallel NumPy arrays, oldest bar first"""
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.close)
+    
+    def take(self, order: np.ndarray) -> 'Bars':
+        """Bars reordered by an index array"""
+        return Bars(self.timestamp[order], self.open[order], self.high[order],
+                    self.low[order], self.close[order], self.volume[order])
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """List-of-dicts form expected by AIAnalysisService"""
+        return [
+            {'timestamp': ts, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for ts, o, h, l, c, v in zip(
+                self.timestamp.tolist(), self.open.tolist(), self.high.tolist(),
+                self.low.tolist(), self.close.tolist(), self.volume.tolist()
+            )
+        ]
+
 class TypedBTCScalpingStrategy(TypedBaseStrategy):
     """Type-safe BTC Scalping Strategy with SQLModel validation"""
 
@@ -32,24 +207,32 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
         super().__init__(strategy_id, db_session)
         self.trading_service = trading_service
         self.performance_service = performance_service
-        self.ai_analysis_service = AIAnalysisService()
-        self.symbol = "BTC/USD"
+        self._ai_service = None  # created on first use, see ai_analysis_service
+        self.symbol = _load_resolved_symbols().get(str(strategy_id))
+        self._symbol_resolved = self.symbol is not None
+        if not self._symbol_resolved:
+            self.symbol = SYMBOL_FORMATS[0]
+        self._symbol_unresolved_until = 0.0  # monotonic time before which probing is skipped
         self.is_running = False
         
-        self.current_position = None
-        self.last_signal_time = None
+        self.current_position: Optional[OpenPosition] = None
+        self.last_signal_time = None  # wall-clock time, for status reporting
+        self._last_signal_mono = float('-inf')  # monotonic time, for the cooldown
+        self._open_position_count: Optional[int] = None  # kept in step with entries/exits, see start()
         self.last_ai_analysis = None
         
-        # Initialize crypto data client
-        try:
-            self.crypto_data_client = CryptoHistoricalDataClient(
-                api_key=os.getenv("ALPACA_API_KEY"),
-                secret_key=os.getenv("ALPACA_SECRET_KEY")
-            )
-            logger.info("Crypto data client initialized successfully")
-        except Exception as e:
-            logger.error(f"Error initializing crypto data client: {e}")
-            self.crypto_data_client = None
+        # Settings-derived constants used on every bar (filled by refresh_config)
+        self._short_n = 0
+        self._long_n = 0
+        self._position_size = 0.0
+        self._tp_mul_buy = self._tp_mul_sell = 1.0
+        self._sl_mul_buy = self._sl_mul_sell = 1.0
+        self._min_volume = 0.0
+        self._paper_trading_mode = True
+        self._ai_threshold = 0.0
+        self._combine_ai = True
+        self._use_ai = True
+        self._max_positions = 0
         
         logger.info(f"Typed BTC Scalping Strategy initialized for strategy {strategy_id}")
     
@@ -58,6 +241,45 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
         """Get typed BTC scalping settings"""
         return self.settings if isinstance(self.settings, BTCScalpingSettings) else None
     
+    @property
+    def ai_analysis_service(self):
+        """AIAnalysisService, constructed the first time AI analysis actually runs"""
+        if self._ai_service is None:
+            from services.ai_analysis_service import AIAnalysisService
+            self._ai_service = AIAnalysisService()
+        return self._ai_service
+    
+    def refresh_config(self) -> None:
+        """Recompute the settings-derived constants used on every bar"""
+        settings = self.btc_settings
+        if not settings:
+            return
+        self._short_n = int(settings.short_ma_periods)
+        self._long_n = int(settings.long_ma_periods)
+        self._position_size = float(settings.position_size)
+        self._tp_mul_buy = 1.0 + settings.take_profit_pct
+        self._tp_mul_sell = 1.0 - settings.take_profit_pct
+        self._sl_mul_buy = 1.0 - settings.stop_loss_pct
+        self._sl_mul_sell = 1.0 + settings.stop_loss_pct
+        self._min_volume = float(settings.min_volume)
+        self._paper_trading_mode = settings.paper_trading_mode
+        self._ai_threshold = settings.ai_confidence_threshold
+        self._combine_ai = settings.combine_ai_with_technical
+        self._use_ai = settings.use_ai_analysis
+        self._max_positions = int(settings.max_positions)
+    
+    def refresh_settings(self) -> None:
+        """Refresh settings from database and recompute derived constants"""
+        super().refresh_settings()
+        self.refresh_config()
+    
+    def update_settings(self, **kwargs) -> bool:
+        """Update settings and recompute derived constants"""
+        updated = super().update_settings(**kwargs)
+        if updated:
+            self.refresh_config()
+        return updated
+    
     def start(self) -> bool:
         """Start the strategy with validation"""
         try:
@@ -70,6 +292,8 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
                 logger.error(f"No BTC settings found for strategy {self.strategy_id}")
                 return False
                 
+            self.refresh_config()
+            self._open_position_count = self._count_open_positions()
             self.is_running = True
             logger.info(f"✅ Typed BTC Scalping Strategy {self.strategy_id} started")
             logger.info(f"Settings: position_size={self.btc_settings.position_size}, "
@@ -104,148 +328,116 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
             
         try:
             # Get current market data
-            bars_data = self._get_recent_bars()
-            if bars_data is None or len(bars_data) < self.btc_settings.long_ma_periods:
+            bars = self._get_recent_bars()
+            if bars is None or len(bars) < self._long_n:
                 logger.info(f"[{datetime.now().strftime('%H:%M:%S')}] ASSESSMENT: Insufficient data for analysis "
-                           f"(got {len(bars_data) if bars_data is not None else 0} bars, "
-                           f"need {self.btc_settings.long_ma_periods})")
+                           f"(got {len(bars) if bars is not None else 0} bars, "
+                           f"need {self._long_n})")
                 return
+            
+            # Start fetching the next minute's bars now so that request overlaps this
+            # tick's (possibly slow) AI analysis and the sleep, instead of delaying the next tick
+            bars_cache.prefetch(self.symbol)
                 
             # Get current price for logging
-            current_price = bars_data.iloc[-1]['close']
-            current_volume = bars_data.iloc[-1]['volume']
+            current_price = bars.close[-1]
+            current_volume = bars.volume[-1]
             
             # Analyze market and generate signals
-            signal = self._analyze_market(bars_data)
+            signal = self._analyze_market(bars)
             
-            # Log detailed assessment
-            assessment_time = datetime.now().strftime('%H:%M:%S')
+            # Log detailed assessment; `now` is also the entry time if a position is opened
+            now = datetime.now()
+            assessment_time = now.strftime('%H:%M:%S')
             if signal:
                 logger.info(f"[{assessment_time}] SIGNAL: {signal} - Price: ${current_price:.2f}, Volume: {current_volume:.0f}")
-                self._execute_signal(signal, bars_data.iloc[-1])
+                self._execute_signal(signal, current_price, now)
             else:
                 logger.info(f"[{assessment_time}] NO ACTION - Price: ${current_price:.2f}, Volume: {current_volume:.0f} - Conditions not met")
                 
             # Check existing positions
             if self.current_position:
-                self._manage_position(bars_data.iloc[-1])
+                self._manage_position(current_price)
                 
         except Exception as e:
             logger.error(f"Error in strategy iteration: {e}")
     
-    def _get_recent_bars(self) -> pd.DataFrame:
+    def _get_recent_bars(self) -> Optional[Bars]:
         """Get recent price bars for analysis"""
         try:
-            if not self.crypto_data_client:
-                logger.error("Crypto data client not initialized")
+            # Every format failed recently; don't repeat the same failing requests each tick
+            if time.monotonic() < self._symbol_unresolved_until:
                 return None
-                
-            # Get data for the last hour with 1-minute bars
-            end_time = datetime.now()
-            start_time = end_time - timedelta(hours=2)  # Extended time window
             
-            # Try different symbol formats that Alpaca might accept
-            symbols_to_try = [self.symbol, "BTCUSD", "BTC-USD"]
+            # Last two hours of 1-minute bars, shared with other strategies via bars_cache
+            # Try different symbol formats that Alpaca might accept, unless one already worked
+            if self._symbol_resolved:
+                symbols_to_try = (self.symbol,)
+            else:
+                symbols_to_try = (self.symbol,) + tuple(f for f in SYMBOL_FORMATS if f != self.symbol)
             
             for symbol in symbols_to_try:
                 try:
                     logger.debug(f"Trying to get crypto bars for symbol: {symbol}")
-                    request = CryptoBarsRequest(
-                        symbol_or_symbols=[symbol],
-                        timeframe=TimeFrame.Minute,
-                        start=start_time,
-                        end=end_time
-                    )
-                    
-                    bars = self.crypto_data_client.get_crypto_bars(request)
-                    
-                    # Check if we got data (BarSet object)
-                    if hasattr(bars, 'data') and symbol in bars.data and len(bars.data[symbol]) > 0:
-                        logger.debug(f"Successfully got {len(bars.data[symbol])} bars for {symbol}")
+                    # Unresolved formats are probed alone so an invalid one can't sink the shared batch
+                    data_source = bars_cache.get_or_fetch(symbol, batch=self._symbol_resolved)
+                    if data_source:
+                        logger.debug(f"Successfully got {len(data_source)} bars for {symbol}")
                         self.symbol = symbol  # Update to working symbol format
                         break
-                    elif hasattr(bars, symbol) and bars[symbol] and len(bars[symbol]) > 0:
-                        logger.debug(f"Successfully got {len(bars[symbol])} bars for {symbol}")
-                        self.symbol = symbol
-                        break
-                    else:
-                        logger.warning(f"No data returned for symbol: {symbol}")
                         
                 except Exception as e:
                     logger.warning(f"Failed to get data for symbol {symbol}: {e}")
                     continue
             else:
                 logger.error("Failed to get data for any symbol format")
+                # Probe every format again after the delay in case the resolved one stopped working
+                self._symbol_resolved = False
+                self._symbol_unresolved_until = time.monotonic() + SYMBOL_RETRY_DELAY
                 return None
             
-            # Convert to DataFrame - handle different BarSet structures
-            bar_list = []
-            data_source = None
-            
-            if hasattr(bars, 'data') and self.symbol in bars.data:
-                data_source = bars.data[self.symbol]
-            elif hasattr(bars, self.symbol):
-                data_source = getattr(bars, self.symbol.replace('/', ''))  # Try without slash
-            elif hasattr(bars, self.symbol.replace('/', '')):
-                data_source = getattr(bars, self.symbol.replace('/', ''))
-                
-            if not data_source:
-                logger.warning(f"No data found for {self.symbol} in bars object")
-                return None
+            if not self._symbol_resolved:
+                self._symbol_resolved = True
+                _save_resolved_symbol(self.strategy_id, self.symbol)
+            
+            # Fill typed arrays in one pass each (no per-bar dicts or dtype inference),
+            # then transpose so every field is its own contiguous float64 array
+            n = len(data_source)
+            timestamps = np.fromiter((bar.timestamp for bar in data_source), dtype=object, count=n)
+            ohlcv = np.fromiter(
+                ((bar.open, bar.high, bar.low, bar.close, bar.volume) for bar in data_source),
+                dtype=OHLCV_ROW, count=n
+            ).T.copy()
                 
-            for bar in data_source:
-                bar_list.append({
-                    'timestamp': bar.timestamp,
-                    'open': float(bar.open),
-                    'high': float(bar.high),
-                    'low': float(bar.low),
-                    'close': float(bar.close),
-                    'volume': float(bar.volume)
-                })
-                
-            df = pd.DataFrame(bar_list)
-            if len(df) > 0:
-                df = df.sort_values('timestamp').reset_index(drop=True)
+            result = Bars(timestamps, *ohlcv)
+            
+            # Alpaca returns bars in time order; only sort if that ever changes
+            if n > 1 and not (timestamps[1:] >= timestamps[:-1]).all():
+                result = result.take(np.argsort(timestamps, kind='stable'))
                 
-            return df
+            return result
             
         except Exception as e:
             logger.error(f"Error getting market data: {e}")
             return None
     
-    def _analyze_market(self, bars_data: pd.DataFrame) -> str:
+    def _analyze_market(self, bars: Bars) -> str:
         """AI-enhanced market analysis with typed settings"""
         try:
-            if len(bars_data) < self.btc_settings.long_ma_periods:
+            if len(bars) < self._long_n:
                 return None
             
-            # Convert DataFrame to list format for AI service
-            price_data = []
-            for _, row in bars_data.iterrows():
-                price_data.append({
-                    'timestamp': row['timestamp'],
-                    'open': row['open'],
-                    'high': row['high'],
-                    'low': row['low'],
-                    'close': row['close'],
-                    'volume': row['volume']
-                })
-            
-            # Calculate technical indicators
-            technical_indicators = self.ai_analysis_service.calculate_technical_indicators(price_data)
-            
             # Get traditional technical analysis signal
-            traditional_signal = self._get_traditional_signal(bars_data, technical_indicators)
+            traditional_signal = self._get_traditional_signal(bars)
+            
+            # When signals must agree, no AI answer can turn "no signal" into a trade
+            if traditional_signal is None and self._combine_ai:
+                return None
             
             # Get AI analysis if enabled
-            if self.btc_settings.use_ai_analysis:
+            if self._use_ai:
                 try:
-                    ai_analysis = self.ai_analysis_service.analyze_market_data(
-                        symbol=self.symbol,
-                        price_data=price_data,
-                        technical_indicators=technical_indicators,
-                        market_context={"strategy": "scalping", "timeframe": "1min"}
-                    )
+                    ai_analysis = self._request_ai_analysis(bars)
                     
                     ai_signal = ai_analysis.get("signal", "HOLD")
                     ai_confidence = ai_analysis.get("confidence", 0.5)
@@ -270,72 +462,55 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
             logger.error(f"Error in market analysis: {e}")
             return None
     
-    def _get_traditional_signal(self, bars_data: pd.DataFrame, technical_indicators: Dict) -> str:
+    def _request_ai_analysis(self, bars: Bars) -> Dict[str, Any]:
+        """Calculate indicators and run the AI market analysis for the current window"""
+        price_data = bars.to_records()
+        technical_indicators = self.ai_analysis_service.calculate_technical_indicators_arr(bars.close, bars.volume)
+        return self.ai_analysis_service.analyze_market_data(
+            symbol=self.symbol,
+            price_data=price_data,
+            technical_indicators=technical_indicators,
+            market_context={"strategy": "scalping", "timeframe": "1min"}
+        )
+    
+    def _get_traditional_signal(self, bars: Bars) -> str:
         """Traditional technical analysis with typed settings"""
         try:
-            # Calculate moving averages using typed settings
-            bars_data['short_ma'] = bars_data['close'].rolling(
-                window=self.btc_settings.short_ma_periods
-            ).mean()
-            bars_data['long_ma'] = bars_data['close'].rolling(
-                window=self.btc_settings.long_ma_periods
-            ).mean()
-            
-            # Get latest values
-            latest = bars_data.iloc[-1]
-            
-            # Check volume with typed settings
-            actual_volume = latest['volume']
-            effective_volume = actual_volume
-            
-            # Handle paper trading zero volume
-            if self.btc_settings.paper_trading_mode and actual_volume == 0:
-                effective_volume = self.btc_settings.fallback_volume
-                logger.info(f"  📄 Paper trading mode: Using fallback volume {effective_volume} (actual: {actual_volume})")
-            
-            if effective_volume < self.btc_settings.min_volume:
-                if actual_volume == 0 and self.btc_settings.paper_trading_mode:
-                    logger.info(f"  ✅ Volume check bypassed in paper trading mode")
-                else:
-                    logger.info(f"  ❌ Volume too low: {effective_volume:.0f} < {self.btc_settings.min_volume}")
-                    return None
+            # Only the latest MA values are needed, so average the tail slices
+            # instead of materializing full rolling columns every iteration
+            current_short_ma, current_long_ma, buy_signal = ma_crossover(
+                bars.close, self._short_n, self._long_n
+            )
+            current_price = bars.close[-1]
             
-            # Avoid rapid-fire signals
-            current_time = datetime.now()
-            if (self.last_signal_time and 
-                (current_time - self.last_signal_time).seconds < 300):  # 5 minutes
-                time_since_last = (current_time - self.last_signal_time).seconds
-                logger.info(f"  ❌ Cooldown active: {time_since_last}s since last signal (need 300s)")
+            # Check volume with typed settings (zero-volume paper bars pass)
+            if not volume_ok(bars.volume[-1:], self._min_volume, self._paper_trading_mode)[0]:
+                logger.debug("  ❌ Volume too low: %.0f < %.0f", bars.volume[-1], self._min_volume)
                 return None
             
-            # Moving average crossover strategy
-            current_short_ma = latest['short_ma']
-            current_long_ma = latest['long_ma']
-            current_price = latest['close']
+            # Avoid rapid-fire signals
+            time_since_last = time.monotonic() - self._last_signal_mono
+            if time_since_last < SIGNAL_COOLDOWN:
+                logger.debug("  ❌ Cooldown active: %.0fs since last signal (need %.0fs)", time_since_last, SIGNAL_COOLDOWN)
+                return None
             
             # Check for valid MA values
-            if pd.isna(current_short_ma) or pd.isna(current_long_ma):
-                logger.info(f"  ❌ Invalid MA values: Short MA={current_short_ma}, Long MA={current_long_ma}")
+            if np.isnan(current_short_ma) or np.isnan(current_long_ma):
+                logger.debug("  ❌ Invalid MA values: Short MA=%s, Long MA=%s", current_short_ma, current_long_ma)
                 return None
             
-            # Log current conditions
-            short_above_long = current_short_ma > current_long_ma
-            price_above_short = current_price > current_short_ma
-            
-            logger.info(f"  📊 Technical Analysis:")
-            logger.info(f"     Short MA ({self.btc_settings.short_ma_periods}): ${current_short_ma:.2f}")
-            logger.info(f"     Long MA ({self.btc_settings.long_ma_periods}): ${current_long_ma:.2f}")
-            logger.info(f"     Price > Short MA: {price_above_short} (${current_price:.2f} > ${current_short_ma:.2f})")
-            logger.info(f"     Short MA > Long MA: {short_above_long}")
+            # Full per-tick assessment only at DEBUG; run_iteration logs SIGNAL / NO ACTION
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("  📊 Technical Analysis:")
+                logger.debug("     Short MA (%d): $%.2f", self._short_n, current_short_ma)
+                logger.debug("     Long MA (%d): $%.2f", self._long_n, current_long_ma)
+                logger.debug("     Price > Short MA: %s ($%.2f > $%.2f)",
+                             current_price > current_short_ma, current_price, current_short_ma)
+                logger.debug("     Short MA > Long MA: %s", current_short_ma > current_long_ma)
+                logger.debug("  %s", "✅ BUY conditions met!" if buy_signal else "❌ BUY conditions not met")
             
             # Buy signal: short MA crosses above long MA
-            if short_above_long and price_above_short:
-                logger.info(f"  ✅ BUY conditions met!")
-                return "BUY"
-            else:
-                logger.info(f"  ❌ BUY conditions not met")
-            
-            return None
+            return "BUY" if buy_signal else None
             
         except Exception as e:
             logger.error(f"Error in traditional analysis: {e}")
@@ -345,33 +520,27 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
         """Combine traditional and AI signals with typed settings"""
         try:
             # If AI confidence is low, rely on traditional
-            if ai_confidence < self.btc_settings.ai_confidence_threshold:
+            if ai_confidence < self._ai_threshold:
                 logger.info(f"AI confidence too low ({ai_confidence:.2f}), using traditional signal: {traditional_signal}")
                 return traditional_signal
             
-            # Combine signals - both must agree for BUY
-            if self.btc_settings.combine_ai_with_technical:
-                if traditional_signal == "BUY" and ai_signal == "BUY":
-                    logger.info("Both AI and traditional analysis agree on BUY")
-                    return "BUY"
-                elif traditional_signal == "SELL" and ai_signal == "SELL":
-                    logger.info("Both AI and traditional analysis agree on SELL")
-                    return "SELL"
+            # Combine signals - both must agree
+            if self._combine_ai:
+                combined = AGREED_SIGNALS.get((traditional_signal, ai_signal))
+                if combined:
+                    logger.info(f"Both AI and traditional analysis agree on {combined}")
                 else:
                     logger.info(f"Signals disagree - Traditional: {traditional_signal}, AI: {ai_signal} - HOLD")
-                    return None
-            else:
-                # Use AI signal if available and confident
-                if ai_confidence > 0.7:
-                    return ai_signal
-                else:
-                    return traditional_signal
+                return combined
+            
+            # Use AI signal if available and confident
+            return ai_signal if ai_confidence > AI_STANDALONE_CONFIDENCE else traditional_signal
                     
         except Exception as e:
             logger.error(f"Error combining signals: {e}")
             return traditional_signal
     
-    def _execute_signal(self, signal: str, current_bar):
+    def _execute_signal(self, signal: str, current_price: float, now: datetime):
         """Execute trading signal with typed settings"""
         try:
             # Check if we already have a position
@@ -380,17 +549,19 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
                 return
                 
             # Check max positions limit using typed settings
-            if self._count_open_positions() >= self.btc_settings.max_positions:
+            if self._open_position_count is None:
+                self._open_position_count = self._count_open_positions()
+            if self._open_position_count >= self._max_positions:
                 logger.debug("Maximum positions reached, skipping signal")
                 return
                 
             if signal == "BUY":
-                self._enter_position("buy", current_bar['close'])
+                self._enter_position("buy", current_price, now)
                 
         except Exception as e:
             logger.error(f"Error executing signal: {e}")
     
-    def _enter_position(self, side: str, price: float):
+    def _enter_position(self, side: str, price: float, now: datetime):
         """Enter a new position using typed settings"""
         try:
             # Place order through trading service using typed settings
@@ -399,46 +570,47 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
                 strategy_id=self.strategy_id,
                 symbol=self.symbol,
                 side=order_side,
-                quantity=self.btc_settings.position_size,  # Type-safe access
+                quantity=self._position_size,
                 db=self.db_session
             )
             
             if trade:
-                self.current_position = {
-                    'trade_id': trade.id,
-                    'side': side,
-                    'entry_price': price,
-                    'quantity': self.btc_settings.position_size,
-                    'timestamp': datetime.now(),
-                    'take_profit_price': price * (1 + self.btc_settings.take_profit_pct) if side == "buy" else price * (1 - self.btc_settings.take_profit_pct),
-                    'stop_loss_price': price * (1 - self.btc_settings.stop_loss_pct) if side == "buy" else price * (1 + self.btc_settings.stop_loss_pct)
-                }
+                self._open_position_count = (self._open_position_count or 0) + 1
+                self.current_position = OpenPosition(
+                    trade_id=trade.id,
+                    side=side,
+                    entry_price=price,
+                    quantity=self._position_size,
+                    timestamp=now,
+                    take_profit_price=price * (self._tp_mul_buy if side == "buy" else self._tp_mul_sell),
+                    stop_loss_price=price * (self._sl_mul_buy if side == "buy" else self._sl_mul_sell)
+                )
                 
-                self.last_signal_time = datetime.now()
-                logger.info(f"Entered {side} position: {self.btc_settings.position_size} {self.symbol} at ${price:.2f}")
+                self._last_signal_mono = time.monotonic()
+                self.last_signal_time = now
+                logger.info(f"Entered {side} position: {self._position_size} {self.symbol} at ${price:.2f}")
                 
         except Exception as e:
             logger.error(f"Error entering position: {e}")
     
-    def _manage_position(self, current_bar):
+    def _manage_position(self, current_price: float):
         """Manage existing position for exits"""
         if not self.current_position:
             return
             
         try:
-            current_price = current_bar['close']
-            side = self.current_position['side']
+            side = self.current_position.side
             
             should_exit = False
             exit_reason = ""
             
             if side == "buy":
                 # Check take profit
-                if current_price >= self.current_position['take_profit_price']:
+                if current_price >= self.current_position.take_profit_price:
                     should_exit = True
                     exit_reason = "take_profit"
                 # Check stop loss
-                elif current_price <= self.current_position['stop_loss_price']:
+                elif current_price <= self.current_position.stop_loss_price:
                     should_exit = True
                     exit_reason = "stop_loss"
                     
@@ -455,22 +627,22 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
                 return
                 
             # Place opposite order to close position
-            side = self.current_position['side']
+            side = self.current_position.side
             opposite_side = OrderSide.SELL if side == "buy" else OrderSide.BUY
             
             trade = self.trading_service.place_order(
                 strategy_id=self.strategy_id,
                 symbol=self.symbol,
                 side=opposite_side,
-                quantity=self.current_position['quantity'],
+                quantity=self.current_position.quantity,
                 db=self.db_session
             )
             
             if trade:
                 # Calculate P&L
-                entry_price = self.current_position['entry_price']
+                entry_price = self.current_position.entry_price
                 exit_price = price if price else entry_price  # Fallback if no price provided
-                quantity = self.current_position['quantity']
+                quantity = self.current_position.quantity
                 
                 if side == "buy":
                     pnl = (exit_price - entry_price) * quantity
@@ -481,17 +653,19 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
                 
                 # Clear position
                 self.current_position = None
+                if self._open_position_count:
+                    self._open_position_count -= 1
                 
         except Exception as e:
             logger.error(f"Error exiting position: {e}")
     
     def _count_open_positions(self) -> int:
-        """Count current open positions for this strategy"""
+        """Count open positions for this strategy in the DB (used to reconcile the in-process count)"""
         try:
+            from sqlalchemy import func
             from sqlmodel import select
-            statement = select(Position).where(Position.strategy_id == self.strategy_id)
-            positions = self.db_session.exec(statement).all()
-            return len(positions)
+            statement = select(func.count()).select_from(Position).where(Position.strategy_id == self.strategy_id)
+            return self.db_session.exec(statement).one()
         except Exception as e:
             logger.error(f"Error counting positions: {e}")
             return 0
@@ -509,7 +683,8 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
             "settings": self.get_settings_dict(),
             "last_signal_time": self.last_signal_time.isoformat() if self.last_signal_time else None,
             "ai_enabled": self.btc_settings.use_ai_analysis,
-            "ai_provider": getattr(self.ai_analysis_service, 'ai_provider', 'fallback')
+            # None until the AI service has been needed at least once
+            "ai_provider": getattr(self._ai_service, 'ai_provider', None)
         }
         
         # Add latest AI analysis if available
@@ -553,103 +728,42 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
             
             # Add technical indicators to data
             data = data.copy()
-            data['short_ma'] = data['close'].rolling(window=final_config["short_ma_periods"]).mean()
-            data['long_ma'] = data['close'].rolling(window=final_config["long_ma_periods"]).mean()
+            close = data['close'].to_numpy(np.float64)
+            data['short_ma'] = rolling_mean(close, final_config["short_ma_periods"])
+            data['long_ma'] = rolling_mean(close, final_config["long_ma_periods"])
             data['rsi'] = self._calculate_rsi(data['close'], 14)
             
-            # Trading simulation variables
-            trades = []
-            capital = initial_capital
-            current_position = None
-            equity_curve = []
-            max_portfolio_value = initial_capital
-            
-            # Run simulation
-            for i in range(final_config["long_ma_periods"], len(data)):
-                current_bar = data.iloc[i]
-                timestamp = current_bar['timestamp']
-                price = current_bar['close']
-                
-                # Record portfolio value
-                portfolio_value = capital
-                if current_position:
-                    position_value = current_position['quantity'] * price
-                    portfolio_value = capital + position_value
-                
-                equity_curve.append({
-                    'timestamp': timestamp,
-                    'portfolio_value': portfolio_value,
-                    'cash': capital
-                })
-                
-                max_portfolio_value = max(max_portfolio_value, portfolio_value)
-                
-                # Check for exit signals first
-                if current_position:
-                    should_exit, exit_reason = self._check_exit_condition(current_position, current_bar, final_config)
-                    
-                    if should_exit:
-                        # Execute exit trade
-                        pnl = self._calculate_position_pnl(current_position, price)
-                        capital += pnl
-                        
-                        trade = BacktestTrade(
-                            timestamp=timestamp,
-                            symbol="BTC/USD",
-                            side="sell" if current_position['side'] == "buy" else "buy",
-                            quantity=current_position['quantity'],
-                            price=price,
-                            pnl=pnl,
-                            reason=exit_reason
-                        )
-                        trades.append(trade)
-                        current_position = None
-                
-                # Check for entry signals
-                if not current_position:
-                    entry_signal = self._check_entry_signal(data.iloc[max(0, i-10):i+1], final_config)
-                    
-                    if entry_signal in ['buy', 'sell']:
-                        # Calculate position size
-                        position_value = capital * final_config["position_size_pct"]
-                        quantity = position_value / price
-                        
-                        current_position = {
-                            'side': entry_signal,
-                            'entry_price': price,
-                            'entry_time': timestamp,
-                            'quantity': quantity
-                        }
-                        
-                        # Record entry trade
-                        trade = BacktestTrade(
-                            timestamp=timestamp,
-                            symbol="BTC/USD", 
-                            side=entry_signal,
-                            quantity=quantity,
-                            price=price,
-                            reason="Entry signal"
-                        )
-                        trades.append(trade)
-            
-            # Calculate final metrics
-            final_capital = capital
-            if current_position:
-                # Close any remaining position
-                final_price = data.iloc[-1]['close']
-                pnl = self._calculate_position_pnl(current_position, final_price)
-                final_capital += pnl
-                
-                # Add final exit trade
-                trades.append(BacktestTrade(
-                    timestamp=data.iloc[-1]['timestamp'],
+            # Run simulation in the compiled kernel on float64 column arrays
+            timestamps = data['timestamp'].tolist()
+            portfolio, cash, trade_rows, trade_count, final_capital = _run_backtest(
+                close,
+                data['short_ma'].to_numpy(np.float64),
+                data['long_ma'].to_numpy(np.float64),
+                data['rsi'].to_numpy(np.float64),
+                final_config["long_ma_periods"],
+                float(final_config["position_size_pct"]),
+                float(initial_capital),
+                float(final_config["rsi_overbought"]),
+                float(final_config["rsi_oversold"])
+            )
+            
+            start = final_config["long_ma_periods"]
+            equity_curve = [
+                {'timestamp': timestamps[start + j], 'portfolio_value': value, 'cash': cash_value}
+                for j, (value, cash_value) in enumerate(zip(portfolio.tolist(), cash.tolist()))
+            ]
+            trades = [
+                BacktestTrade(
+                    timestamp=timestamps[int(row[BT_BAR])],
                     symbol="BTC/USD",
-                    side="sell" if current_position['side'] == "buy" else "buy",
-                    quantity=current_position['quantity'], 
-                    price=final_price,
-                    pnl=pnl,
-                    reason="Backtest end"
-                ))
+                    side=BT_SIDES[int(row[BT_SIDE])],
+                    quantity=row[BT_QTY],
+                    price=row[BT_PRICE],
+                    pnl=None if np.isnan(row[BT_PNL]) else row[BT_PNL],
+                    reason=BT_REASONS[int(row[BT_REASON])]
+                )
+                for row in trade_rows[:trade_count].tolist()
+            ]
             
             # Calculate performance metrics
             total_return = final_capital - initial_capital
@@ -677,7 +791,6 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
                 returns.append(daily_return)
             
             if returns:
-                import numpy as np
                 sharpe_ratio = np.mean(returns) / np.std(returns) * np.sqrt(252) if np.std(returns) > 0 else 0
             else:
                 sharpe_ratio = 0
@@ -719,53 +832,3 @@ class TypedBTCScalpingStrategy(TypedBaseStrategy):
         rs = gain / loss
         rsi = 100 - (100 / (1 + rs))
         return rsi
-    
-    def _check_exit_condition(self, position: dict, current_bar: pd.Series, config: dict) -> tuple[bool, str]:
-        """Check if position should be exited"""
-        # Simple exit conditions - can be enhanced
-        entry_price = position['entry_price']
-        current_price = current_bar['close']
-        
-        # Stop loss: 2% loss
-        if position['side'] == 'buy' and current_price < entry_price * 0.98:
-            return True, "Stop loss"
-        elif position['side'] == 'sell' and current_price > entry_price * 1.02:
-            return True, "Stop loss"
-        
-        # Take profit: 1% gain
-        if position['side'] == 'buy' and current_price > entry_price * 1.01:
-            return True, "Take profit"
-        elif position['side'] == 'sell' and current_price < entry_price * 0.99:
-            return True, "Take profit"
-        
-        return False, ""
-    
-    def _check_entry_signal(self, recent_data: pd.DataFrame, config: dict) -> str:
-        """Check for entry signals based on technical indicators"""
-        if len(recent_data) < 2:
-            return "hold"
-        
-        current = recent_data.iloc[-1]
-        previous = recent_data.iloc[-2]
-        
-        # Simple MA crossover strategy
-        if (current['short_ma'] > current['long_ma'] and 
-            previous['short_ma'] <= previous['long_ma'] and
-            current['rsi'] < config['rsi_overbought']):
-            return "buy"
-        elif (current['short_ma'] < current['long_ma'] and 
-              previous['short_ma'] >= previous['long_ma'] and
-              current['rsi'] > config['rsi_oversold']):
-            return "sell"
-        
-        return "hold"
-    
-    def _calculate_position_pnl(self, position: dict, current_price: float) -> float:
-        """Calculate P&L for a position"""
-        entry_price = position['entry_price']
-        quantity = position['quantity']
-        
-        if position['side'] == 'buy':
-            return (current_price - entry_price) * quantity
-        else:
-            return (entry_price - current_price) * quantity
\ No newline at end of file
@@ -191,7 +191,8 @@ class PortfolioDistributorStrategy(BaseStrategy):
                                 symbol=symbol,
                                 side=OrderSide.BUY,
                                 quantity=quantity,
-                                db=db
+                                db=db,
+                                commit=False  # Committed once with the portfolio update below
                             )
                             
                             investment_results.append({
@@ -207,7 +208,7 @@ class PortfolioDistributorStrategy(BaseStrategy):
                     self.logger.error(f"Error investing in {symbol}: {e}")
                     continue
             
-            # Update next investment date
+            # Update next investment date (also commits the trades placed above)
             portfolio.next_investment_date = self._calculate_next_investment_date(
                 portfolio.investment_frequency
             )
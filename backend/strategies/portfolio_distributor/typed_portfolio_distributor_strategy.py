@@ -211,7 +211,8 @@ class TypedPortfolioDistributorStrategy(TypedBaseStrategy):
                                 symbol=symbol,
                                 side=OrderSide.BUY,
                                 quantity=quantity,
-                                db=self.db_session
+                                db=self.db_session,
+                                commit=False  # Committed once with the portfolio update below
                             )
                             
                             investment_results.append({
@@ -227,7 +228,7 @@ class TypedPortfolioDistributorStrategy(TypedBaseStrategy):
                     logger.error(f"Error investing in {symbol}: {e}")
                     continue
             
-            # Update next investment date
+            # Update next investment date (also commits the trades placed above)
             portfolio.next_investment_date = self._calculate_next_investment_date()
             self.db_session.commit()
             
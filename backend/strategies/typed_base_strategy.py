@@ -4,7 +4,7 @@ Provides typed settings access with full validation and IDE support
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional, Protocol, Union
 from sqlmodel import Session, select
 import pandas as pd
 from strategies.base_strategy import BacktestResult
@@ -16,6 +16,17 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+class StrategyInstance(Protocol):
+    """What TypedStrategyRunner needs from a running strategy"""
+    
+    db_session: Session
+    
+    def run_iteration(self) -> None: ...
+    
+    def get_status(self) -> dict: ...
+    
+    def stop(self) -> bool: ...
+
 class TypedBaseStrategy(ABC):
     """Type-safe base class for all trading strategies using SQLModel"""
     
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("alpaca")
+
+from services import bars_cache
+from services.bars_cache import BarsCache
+
+VALID = {"BTC/USD", "ETH/USD"}
+
+
+class FakeClient:
+    """Rejects any request containing an invalid symbol, like Alpaca does"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_crypto_bars(self, request):
+        symbols = list(request.symbol_or_symbols)
+        self.requests.append(symbols)
+        if not VALID.issuperset(symbols):
+            raise ValueError("invalid symbol")
+        return SimpleNamespace(data={symbol: [symbol] for symbol in symbols})
+
+
+@pytest.fixture
+def fake_cache(monkeypatch):
+    cache = BarsCache(sleep_time=0)
+    client = FakeClient()
+    monkeypatch.setattr(BarsCache, "client", property(lambda self: client))
+    monkeypatch.setattr(bars_cache, "CryptoBarsRequest", lambda **kwargs: SimpleNamespace(**kwargs))
+    return cache, client
+
+
+def test_failed_batch_is_retried_per_symbol(fake_cache):
+    cache, client = fake_cache
+    cache._pending.update({"BTCUSD", "ETH/USD"})
+
+    assert cache.get_or_fetch("BTC/USD") == ["BTC/USD"]
+    assert cache.get_or_fetch("ETH/USD") == ["ETH/USD"]
+    assert client.requests[0] == ["BTC/USD", "BTCUSD", "ETH/USD"]
+    assert sorted(client.requests[1:]) == [["BTC/USD"], ["BTCUSD"], ["ETH/USD"]]
+
+
+def test_unbatched_probe_is_requested_alone(fake_cache):
+    cache, client = fake_cache
+    cache._pending.add("ETH/USD")
+
+    assert cache.get_or_fetch("BTC-USD", batch=False) is None
+    assert client.requests == [["BTC-USD"]]
+    assert cache._pending == {"ETH/USD"}
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("alpaca")
+pytest.importorskip("sqlalchemy")
+
+from services.trading_service import TradingService
+
+
+def test_batch_validation_runs_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    calls = []
+
+    def get_current_price(symbol, track=False):
+        calls.append(("price", symbol, threading.get_ident()))
+        return 100.0
+
+    def validate_trades(trades, db):
+        calls.append(("validate", [t["price"] for t in trades], threading.get_ident()))
+        return [(False, [SimpleNamespace(severity="critical", message="too big")])] + [(True, [])] * (len(trades) - 1)
+
+    service = TradingService.__new__(TradingService)
+    service.get_current_price = get_current_price
+    service._risk_service = SimpleNamespace(validate_trades=validate_trades)
+    service.trading_client = SimpleNamespace(submit_order=lambda order: f"filled {order.symbol}")
+    service._invalidate_account_cache = lambda: None
+    service._reset_sync_backoff = lambda: None
+
+    orders = [SimpleNamespace(symbol=symbol, side="buy", qty=1) for symbol in ("AAPL", "MSFT", "AAPL")]
+    results = asyncio.run(service.place_orders_batch(orders, strategy_id=1, db=object()))
+
+    assert isinstance(results[0], ValueError)
+    assert results[1:] == ["filled MSFT", "filled AAPL"]
+    assert sorted(symbol for kind, symbol, _ in calls if kind == "price") == ["AAPL", "MSFT"]
+    assert ("validate", [100.0, 100.0, 100.0]) in [(kind, arg) for kind, arg, _ in calls]
+    assert all(thread != loop_thread for _, _, thread in calls)
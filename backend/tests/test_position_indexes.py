@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("alpaca")
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from database.migrate_add_indexes import add_indexes, ensure_position_unique_index
+from services.trading_service import TradingService
+
+# Tables as created before uq_positions_strategy_symbol was declared on the model
+LEGACY_SCHEMA = (
+    """CREATE TABLE positions (
+        id INTEGER PRIMARY KEY, strategy_id INTEGER, symbol VARCHAR(10), quantity FLOAT,
+        avg_price FLOAT, current_price FLOAT, market_value FLOAT, unrealized_pnl FLOAT,
+        side VARCHAR(10), opened_at DATETIME, updated_at DATETIME
+    )""",
+    "CREATE TABLE trades (id INTEGER PRIMARY KEY, strategy_id INTEGER, position_id INTEGER, status VARCHAR(20))",
+)
+
+
+@pytest.fixture
+def legacy_engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+    return engine
+
+
+def _unique_indexes(engine):
+    return {i["name"] for i in inspect(engine).get_indexes("positions") if i["unique"]}
+
+
+def test_ensure_position_unique_index_collapses_duplicates(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO positions (id, strategy_id, symbol, quantity) VALUES "
+            "(1, 1, 'AAPL', 1), (2, 1, 'AAPL', 2), (3, 1, 'MSFT', 1), (4, 2, 'AAPL', 5)"
+        ))
+        conn.execute(text("INSERT INTO trades (id, strategy_id, position_id, status) VALUES (1, 1, 1, 'filled')"))
+
+    ensure_position_unique_index(legacy_engine)
+    ensure_position_unique_index(legacy_engine)  # second run is a no-op
+
+    assert "uq_positions_strategy_symbol" in _unique_indexes(legacy_engine)
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM positions ORDER BY id")).scalars().all() == [2, 3, 4]
+        assert conn.execute(text("SELECT position_id FROM trades")).scalar() == 2
+
+
+def test_add_indexes_backfills_trade_status_index(legacy_engine):
+    add_indexes(legacy_engine)
+    add_indexes(legacy_engine)
+
+    trade_indexes = {i["name"]: i["column_names"] for i in inspect(legacy_engine).get_indexes("trades")}
+    assert trade_indexes == {"ix_trades_strategy_status": ["strategy_id", "status"]}
+    assert "uq_positions_strategy_symbol" in _unique_indexes(legacy_engine)
+
+
+def test_sqlmodel_create_tables_runs_on_existing_database(tmp_path, monkeypatch):
+    pytest.importorskip("sqlmodel")
+    from database import sqlmodel_database
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+    monkeypatch.setattr(sqlmodel_database, "engine", engine)
+
+    sqlmodel_database.create_tables()
+
+    assert "uq_positions_strategy_symbol" in _unique_indexes(engine)
+    assert "ix_trades_strategy_status" in {i["name"] for i in inspect(engine).get_indexes("trades")}
+
+
+def _service(alpaca_positions):
+    service = TradingService.__new__(TradingService)
+    service._position_synced_at = {}
+    service.trading_client = SimpleNamespace(get_all_positions=lambda: alpaca_positions)
+    return service
+
+
+def _alpaca_position(symbol, qty):
+    return SimpleNamespace(symbol=symbol, qty=str(qty), avg_entry_price="10", current_price="11",
+                           market_value=str(11 * qty), unrealized_pl=str(qty))
+
+
+def test_update_positions_falls_back_to_merge_without_the_index(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("INSERT INTO positions (id, strategy_id, symbol, quantity) VALUES (1, 7, 'AAPL', 1)"))
+
+    with Session(legacy_engine) as db:
+        _service([_alpaca_position("AAPL", 3), _alpaca_position("MSFT", 2)]).update_positions(7, db)
+
+    with legacy_engine.connect() as conn:
+        rows = conn.execute(text("SELECT symbol, quantity FROM positions WHERE strategy_id = 7 ORDER BY symbol")).all()
+    assert [tuple(row) for row in rows] == [("AAPL", 3.0), ("MSFT", 2.0)]
+
+
+def test_update_positions_upserts_once_the_index_exists(legacy_engine):
+    ensure_position_unique_index(legacy_engine)
+    with legacy_engine.begin() as conn:
+        conn.execute(text("INSERT INTO positions (id, strategy_id, symbol, quantity) VALUES (1, 7, 'AAPL', 1)"))
+
+    with Session(legacy_engine) as db:
+        _service([_alpaca_position("AAPL", 4)]).update_positions(7, db)
+
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text("SELECT id, quantity FROM positions")).all() == [(1, 4.0)]
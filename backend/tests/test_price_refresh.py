@@ -0,0 +1,64 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("alpaca")
+pytest.importorskip("sqlalchemy")
+
+from services import trading_service
+from services.trading_service import TradingService
+
+
+@pytest.fixture
+def refresher_state(monkeypatch):
+    monkeypatch.setattr(trading_service, "_PRICE_CACHE", {})
+    monkeypatch.setattr(trading_service, "_TRACKED_SYMBOLS", {})
+    monkeypatch.setattr(trading_service, "_PRICE_REFRESH_TASK", None)
+    monkeypatch.setattr(trading_service, "shared_cache", SimpleNamespace(set_many=lambda values: None))
+
+
+def _service(fetched):
+    service = TradingService.__new__(TradingService)
+    service._refresh_interval = 1.0
+    service._store_quotes = lambda quotes: None
+    service.get_latest_quotes = lambda symbols: fetched.append(symbols) or {
+        s: {'price': 10.0} for s in symbols
+    }
+    service._fetch_quotes = lambda symbols: {s: {'price': 20.0} for s in symbols}
+    return service
+
+
+def test_untracked_lookup_is_not_refreshed(refresher_state):
+    service = _service([])
+
+    service.get_current_price("DEBUG")
+    service.get_current_price("BTCUSD", track=True)
+
+    assert set(trading_service._TRACKED_SYMBOLS) == {"BTCUSD"}
+    assert trading_service._PRICE_CACHE == {"BTCUSD": 10.0}
+
+
+def test_refresher_is_shared_and_expires_unread_symbols(refresher_state):
+    fetched = []
+    api, runner = _service(fetched), _service(fetched)
+
+    async def run():
+        api.start_price_refresh()
+        await asyncio.sleep(0)
+        runner.get_current_price("BTCUSD", track=True)
+        runner.get_current_price("ETHUSD", track=True)
+        trading_service._TRACKED_SYMBOLS["ETHUSD"] = time.monotonic() - 3600
+        await api._refresh_all_tracked()
+        price = runner.get_current_price("BTCUSD", track=True)
+        api.stop_price_refresh()
+        return price
+
+    price = asyncio.run(run())
+
+    # The runner's read is served from the cache the API instance refreshed
+    assert price == 20.0
+    assert fetched == [["BTCUSD"], ["ETHUSD"]]
+    assert set(trading_service._TRACKED_SYMBOLS) == {"BTCUSD"}
+    assert "ETHUSD" not in trading_service._PRICE_CACHE
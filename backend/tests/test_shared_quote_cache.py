@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+
+pytest.importorskip("alpaca")
+pytest.importorskip("sqlalchemy")
+
+from services import trading_service
+from services.trading_service import TradingService
+
+
+class FakeSharedCache:
+    """Round-trips values through orjson like the Redis-backed SharedCache"""
+
+    def __init__(self, values):
+        self.values = {key: orjson.dumps(value) for key, value in values.items()}
+
+    def get_many(self, keys):
+        return {key: orjson.loads(self.values[key]) for key in keys if key in self.values}
+
+
+@pytest.mark.parametrize("timestamp", [
+    datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc),  # Alpaca quote
+    datetime(2024, 5, 1, 12, 30, 15, 250000),  # naive utcnow() fallback
+])
+def test_shared_cache_hit_returns_datetime_timestamp(monkeypatch, timestamp):
+    quote = {'symbol': 'AAPL', 'price': 185.0, 'bid': 185.0, 'ask': 185.1, 'timestamp': timestamp}
+    monkeypatch.setattr(trading_service, "shared_cache", FakeSharedCache({"quote:AAPL": quote}))
+    service = TradingService.__new__(TradingService)
+    service._quote_cache = {}
+
+    loaded = service._load_quotes(["AAPL"])
+
+    assert loaded["AAPL"]["timestamp"] == timestamp
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("alpaca")
+pytest.importorskip("sqlalchemy")
+
+import services.trading_service as trading_service_module
+from services.trading_service import TradingService
+
+
+@pytest.fixture
+def services(monkeypatch):
+    calls = []
+    client = SimpleNamespace(get_all_positions=lambda: calls.append("positions") or [])
+    monkeypatch.setattr(trading_service_module, "get_trading_client", lambda: client)
+    monkeypatch.setattr(trading_service_module, "get_stock_data_client", lambda: None)
+    monkeypatch.setattr(trading_service_module, "get_crypto_data_client", lambda: None)
+    monkeypatch.setattr(trading_service_module, "_FILL_POLL_STATE", {})
+    monkeypatch.setattr(trading_service_module, "_POSITION_SYNCED_AT", {})
+    # e.g. the strategy runner's instance (places orders) and the API's (polls)
+    return TradingService(), TradingService(), calls
+
+
+def test_backoff_reset_reaches_other_instances(services):
+    runner, api, calls = services
+
+    api.update_positions(1, db=None)
+    api.update_positions(1, db=None)
+    assert calls == ["positions"]
+    api._record_fill_poll(1, found_pending=False)
+    assert not api._fill_poll_due(1)
+
+    runner._reset_sync_backoff(1)
+
+    assert api._fill_poll_due(1)
+    api.update_positions(1, db=None)
+    assert calls == ["positions", "positions"]
+
+
+def test_force_bypasses_backoff(services):
+    _, api, calls = services
+
+    api.update_positions(1, db=None)
+    api.update_positions(1, db=None, force=True)
+
+    assert calls == ["positions", "positions"]
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.technical_indicators import ma_crossover
+
+
+def test_ma_crossover_matches_pandas_rolling_mean():
+    close = np.array([100.0, 101.0, 103.0, 102.0, 105.0, 107.0])
+
+    short_ma, long_ma, buy = ma_crossover(close, 2, 4)
+
+    series = pd.Series(close)
+    assert short_ma == pytest.approx(series.rolling(2).mean().iloc[-1])
+    assert long_ma == pytest.approx(series.rolling(4).mean().iloc[-1])
+    assert buy
+
+
+def test_ma_crossover_is_nan_without_a_full_window():
+    close = np.array([100.0, 101.0, 110.0])
+
+    short_ma, long_ma, buy = ma_crossover(close, 2, 5)
+
+    assert short_ma == pytest.approx(105.5)
+    assert np.isnan(long_ma)
+    assert np.isnan(pd.Series(close).rolling(5).mean().iloc[-1])
+    assert not buy
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, inspect, text
+
+from database.migrate_trade_price_nullable import ensure_trade_price_nullable
+
+# trades as created by the SQLModel model before price became Optional
+LEGACY_TRADES = (
+    """CREATE TABLE trades (
+        id INTEGER NOT NULL, strategy_id INTEGER NOT NULL, alpaca_order_id VARCHAR(50) NOT NULL,
+        symbol VARCHAR(10) NOT NULL, avg_price FLOAT NOT NULL, price FLOAT NOT NULL,
+        status VARCHAR(9) NOT NULL, PRIMARY KEY (id), UNIQUE (alpaca_order_id)
+    )""",
+    "CREATE INDEX ix_trades_strategy_status ON trades (strategy_id, status)",
+    "INSERT INTO trades VALUES (1, 1, 'a', 'BTCUSD', 1.0, 50000.0, 'FILLED')",
+)
+
+
+def test_ensure_trade_price_nullable_rebuilds_sqlite_table():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for statement in LEGACY_TRADES:
+            conn.execute(text(statement))
+
+    ensure_trade_price_nullable(engine)
+    ensure_trade_price_nullable(engine)
+
+    columns = {c["name"]: c["nullable"] for c in inspect(engine).get_columns("trades")}
+    assert columns["price"] and not columns["avg_price"]
+    assert [i["name"] for i in inspect(engine).get_indexes("trades")] == ["ix_trades_strategy_status"]
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO trades VALUES (2, 1, 'b', 'BTCUSD', 1.0, NULL, 'PENDING')"))
+        rows = conn.execute(text("SELECT id, price FROM trades ORDER BY id")).all()
+    assert rows == [(1, 50000.0), (2, None)]
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sqlmodel")
+pytest.importorskip("alpaca")
+
+from strategies.btc_scalping.typed_btc_scalping_strategy import TypedBTCScalpingStrategy
+
+
+def _synthetic_bars(n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    close = 30000 + np.cumsum(rng.normal(0, 50, n))
+    return pd.DataFrame({
+        'timestamp': pd.date_range("2024-01-01", periods=n, freq="min"),
+        'open': close,
+        'high': close + 10,
+        'low': close - 10,
+        'close': close,
+        'volume': rng.uniform(1000, 5000, n),
+    })
+
+
+def test_backtest_runs_end_to_end():
+    # backtest() only uses the bars and config, so skip the DB-backed __init__
+    strategy = TypedBTCScalpingStrategy.__new__(TypedBTCScalpingStrategy)
+    data = _synthetic_bars()
+
+    result = strategy.backtest(data, {}, initial_capital=10000.0, days_back=1)
+
+    assert result.initial_capital == 10000.0
+    assert result.total_trades == len(result.trades)
+    assert len(result.equity_curve) == len(data) - 20  # default long_ma_periods
+    assert np.isfinite(result.final_capital)
+    assert np.isfinite(result.sharpe_ratio)
+
+
+def test_backtest_trades_at_bar_closes_with_custom_ma_periods():
+    strategy = TypedBTCScalpingStrategy.__new__(TypedBTCScalpingStrategy)
+    data = _synthetic_bars()
+    config = {'btc_scalping': {'short_ma_periods': 3, 'long_ma_periods': 8}}
+
+    result = strategy.backtest(data, config, initial_capital=10000.0, days_back=1)
+
+    assert len(result.equity_curve) == len(data) - 8
+    assert result.trades
+    closes = dict(zip(data['timestamp'], data['close']))
+    for trade in result.trades:
+        assert trade.price == pytest.approx(closes[trade.timestamp])
@@ -0,0 +1,33 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("alpaca")
+pytest.importorskip("sqlalchemy")
+
+from services import trading_service
+from services.trading_service import TradingService
+
+
+def test_async_fill_poll_bounds_orders_by_oldest_pending_trade(monkeypatch):
+    monkeypatch.setattr(trading_service, "GetOrdersRequest", lambda **kwargs: kwargs)
+    pending = [
+        SimpleNamespace(alpaca_order_id="b", created_at=datetime(2024, 5, 2)),
+        SimpleNamespace(alpaca_order_id="a", created_at=datetime(2024, 5, 1)),
+    ]
+    requests, applied = [], []
+
+    service = TradingService.__new__(TradingService)
+    service._get_pending_trades = lambda strategy_id, db: pending
+    service._record_fill_poll = lambda strategy_id, found_pending: None
+    service.trading_client = SimpleNamespace(
+        get_orders=lambda request: requests.append(request) or [SimpleNamespace(id="a")]
+    )
+    service._apply_fills = lambda trades, orders_by_id, db: applied.append(set(orders_by_id))
+
+    asyncio.run(service.update_filled_orders_async(1, db=None, force=True))
+
+    assert requests[0]["after"] == datetime(2024, 5, 1)
+    assert applied == [{"a"}]